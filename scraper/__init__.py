@@ -0,0 +1,4 @@
+# とらばーゆ 求人情報スクレイピングのエンジン部分
+#
+# app.py（Streamlitの画面）から一度だけインポートされ、再実行のたびに
+# 関数定義を作り直さないようにモジュールとして分離している。
@@ -0,0 +1,177 @@
+# 取得したページの追記専用アーカイブ
+#
+# segment-XXXXX.dat にページ本体をzlib圧縮して追記し、index.jsonl に
+# URL・セグメント・オフセット・長さを1行ずつ記録する。
+# 再抽出時はセグメントをメモリマップで読み込み、複数プロセスで並列に処理する。
+import argparse
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# 1セグメントの最大サイズ（超えたら次のセグメントに切り替える）
+MAX_SEGMENT_BYTES = 256 * 1024 * 1024
+INDEX_FILE = "index.jsonl"
+
+# Append-only archive of fetched pages
+class PageArchive:
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # 集計値（初回のstats()で索引から読み込み、以降は追記時に更新）
+        self._stats = None
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:05d}.dat")
+
+    def _current_segment(self):
+        segments = sorted(
+            int(name[8:13]) for name in os.listdir(self.directory)
+            if name.startswith("segment-") and name.endswith(".dat")
+        )
+        if not segments:
+            return 0
+        segment = segments[-1]
+        if os.path.getsize(self._segment_path(segment)) >= MAX_SEGMENT_BYTES:
+            segment += 1
+        return segment
+
+    # Function to append a fetched page to the archive (truncated: only the beginning of the body was read)
+    def append(self, url, content, status=200, encoding=None, truncated=False):
+        data = zlib.compress(content, 6)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            segment = self._current_segment()
+            with open(self._segment_path(segment), "ab") as f:
+                offset = f.tell()
+                f.write(data)
+            entry = {
+                "url": url,
+                "segment": segment,
+                "offset": offset,
+                "length": len(data),
+                "size": len(content),
+                "status": status,
+                "encoding": encoding,
+                "truncated": truncated,
+                "fetched_at": time.time(),
+            }
+            with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._stats is not None:
+                self._add_to_stats(self._stats, entry)
+        return entry
+
+    # Function to read the index (only the latest entry per URL when latest_only is set)
+    def entries(self, latest_only=True):
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        if latest_only:
+            entries = list({entry["url"]: entry for entry in entries}.values())
+        return entries
+
+    @staticmethod
+    def _add_to_stats(stats, entry):
+        stats["pages"] += 1
+        stats["compressed_bytes"] += entry["length"]
+        stats["original_bytes"] += entry["size"]
+        stats["_urls"].add(entry["url"])
+        stats["urls"] = len(stats["_urls"])
+
+    # Function to summarize the archive (pages, compressed and original bytes)
+    def stats(self):
+        with self._lock:
+            if self._stats is None:
+                # 索引の読み込みは初回のみ（画面の再実行ごとに読み直さない）
+                self._stats = {"pages": 0, "urls": 0, "compressed_bytes": 0, "original_bytes": 0, "_urls": set()}
+                for entry in self.entries(latest_only=False):
+                    self._add_to_stats(self._stats, entry)
+            return {key: value for key, value in self._stats.items() if not key.startswith("_")}
+
+# Memory-mapped reader for archive segments
+class ArchiveReader:
+    def __init__(self, directory):
+        self.directory = directory
+        self._maps = {}
+
+    def read(self, entry):
+        segment = entry["segment"]
+        if segment not in self._maps:
+            with open(os.path.join(self.directory, f"segment-{segment:05d}.dat"), "rb") as f:
+                self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._maps[segment][entry["offset"]:entry["offset"] + entry["length"]]
+        content = zlib.decompress(data)
+        return content.decode(entry.get("encoding") or "utf-8", errors="replace")
+
+    def close(self):
+        for segment_map in self._maps.values():
+            segment_map.close()
+        self._maps.clear()
+
+# Function to re-extract a chunk of archived pages (runs in a worker process)
+def _reextract_chunk(args):
+    directory, entries, extract_page = args
+    reader = ArchiveReader(directory)
+    results = []
+    try:
+        for entry in entries:
+            try:
+                record, error = extract_page(reader.read(entry), entry["url"])
+            except Exception as e:
+                record, error = None, f"再抽出中にエラーが発生しました: {e}"
+            results.append((entry["url"], record, error))
+    finally:
+        reader.close()
+    return results
+
+# Function to run an extractor over archived pages in parallel
+def reextract(directory, entries, extract_page, workers=None, chunk_size=50):
+    # 抽出関数はモジュールレベルの関数として参照で渡す（fork以外の起動方式でも動作する）
+    chunks = [(directory, entries[i:i + chunk_size], extract_page) for i in range(0, len(entries), chunk_size)]
+    if not chunks:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for results in executor.map(_reextract_chunk, chunks):
+            yield from results
+
+# Function to select the archived detail pages to re-extract (the latest complete body per URL; bodies cut short
+# by streamed reads are left out because extraction would run on an incomplete page)
+def detail_entries(archive):
+    entries = {
+        entry["url"]: entry for entry in archive.entries(latest_only=False)
+        if entry.get("status", 200) < 400 and not entry.get("truncated") and '/job_search/' not in entry["url"]
+    }
+    return list(entries.values())
+
+# コマンドラインから再抽出する（例: python -m scraper.archive page_archive_data -o result.csv）
+if __name__ == "__main__":
+    from scraper.detail import extract_archived_page
+    from scraper.store import JobStore
+    from scraper.table import build_job_table
+
+    parser = argparse.ArgumentParser(description="アーカイブ済みの詳細ページから求人情報を再抽出します")
+    parser.add_argument("directory", help="アーカイブのディレクトリ")
+    parser.add_argument("-o", "--output", default="reextract.csv", help="出力するCSVファイル")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="並列プロセス数（既定: CPU数）")
+    args = parser.parse_args()
+
+    entries = detail_entries(PageArchive(args.directory))
+    started_at = time.time()
+    job_list = JobStore()
+    error_count = 0
+    for url, job_details, error in reextract(args.directory, entries, extract_archived_page, workers=args.workers):
+        if error:
+            error_count += 1
+            print(f"{url}: {error}")
+        elif job_details:
+            job_list.append(job_details)
+
+    build_job_table(job_list).to_csv(args.output, index=False, encoding="utf-8-sig")
+    print(f"{len(entries)} ページから {len(job_list)} 件を再抽出しました（失敗 {error_count} 件、{time.time() - started_at:.1f} 秒）: {args.output}")
@@ -0,0 +1,57 @@
+# スクレイピング実行時の設定・共有リソース・実行ごとの状態
+from dataclasses import dataclass, field
+
+from scraper.debug_log import DebugLog
+from scraper.retry import CircuitBreakerRegistry, RetryPolicy
+from scraper.selector_stats import SelectorStats
+from scraper.singleflight import SingleFlight
+
+# Settings and state passed through a scraping run
+@dataclass
+class ScrapeContext:
+    # 画面で指定された設定
+    debug_mode: bool = False
+    show_html: bool = False
+    direct_listing: bool = False
+    optimize_memory: bool = True
+    enable_gc: bool = True
+    bounded_memory: bool = False
+    memory_budget_mb: int = 512
+    max_jobs: int = 10
+    dedupe_mode: bool = False
+    skip_duplicate_details: bool = False
+    listing_only_mode: bool = False
+    required_card_fields: list = field(default_factory=list)
+    archive_pages: bool = False
+    time_budget: int = None  # 時間制限モードの制限時間（秒）
+    discovery: str = "search"  # 求人URLの取得元（"search": 検索結果ページ, "sitemap": サイトマップの索引）
+    sitemap_filter: dict = None  # サイトマップの索引の絞り込み（prefectures, id_ranges, since）
+    prioritize_links: bool = False  # 候補を多めに集め、キーワードとの関連度の高い求人から取得する
+    stream_details: bool = False  # 詳細ページを抽出する項目がそろうところまでだけ取得する
+    facility_cache_ttl: int = None  # 施設情報のキャッシュの保持時間（秒、Noneはキャッシュを使わない）
+    
+    # プロセス全体で共有するリソース（app.pyでst.cache_resourceとして保持）
+    selector_stats: SelectorStats = field(default_factory=SelectorStats)
+    archive: object = None
+    search_index: object = None  # 取得済み求人の全文検索索引
+    sitemap_index: object = None  # サイトマップから取得した求人URLの索引
+    circuit_breakers: CircuitBreakerRegistry = field(default_factory=CircuitBreakerRegistry)
+    single_flight: SingleFlight = field(default_factory=SingleFlight)  # 同じURLへの同時リクエストの共有
+    proxy_pool: object = None  # 送信元プロキシのプール（なければ直接送信）
+    facility_cache: object = None  # 施設ごとの代表者・電話番号のキャッシュ
+    debug_log: DebugLog = field(default_factory=DebugLog)  # セッションごと（app.pyでst.session_stateに保持）
+    
+    # 実行ごとの状態
+    job_cards: dict = field(default_factory=dict)  # 一覧ページのカード（求人URL → 内容）
+    layout_stats: dict = field(default_factory=dict)  # 検出したレイアウト（フィンガープリント → ページ数など）
+    spill_file: object = None  # 省メモリクロールで業務内容を退避する一時ファイル
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)  # 再試行回数（エラーの種類ごと）
+    deadline: float = None  # 時間制限モードの終了時刻（time.monotonic()の値）
+    stream_stats: dict = field(default_factory=dict)  # ストリーミング取得の集計（pages, cut, bytes）
+    memory_check: dict = field(default_factory=dict)  # 省メモリクロールの計測状態（jobs, at, usage, compacted）
+    
+    # Function to write an event to the debug log (info/success only in debug mode)
+    def log(self, level, message, **fields):
+        if level in ("info", "success") and not self.debug_mode:
+            return
+        self.debug_log.log(level, message, **fields)
@@ -0,0 +1,172 @@
+# 検索結果のJSONデータルート（Next.jsの /_next/data/{buildId}/<ページのパス>.json）
+#
+# Next.jsのサイトは画面遷移用に、各ページの表示データ（pageProps）をJSONで返すルートを持つ。
+# 検索結果ページのHTMLに埋め込まれたbuildIdからそのURLを組み立て、2ページ目以降はHTMLの代わりに
+# JSONを取得する。求人ID・総件数をそのまま読めるため、HTMLの取得・解析が不要になる。
+# ルートが使えない場合（buildIdの変更、サイトの仕様変更など）は呼び出し側でHTMLの取得に戻る。
+import re
+import threading
+import urllib.parse
+from collections import deque
+
+from scraper.fetch import fetch_shared, make_request
+from scraper.page_data import PAGE_DATA_KEYS, SKIPPED_KEY_PATTERN, get_page_data_text, load_next_data
+
+# データルートのURL
+DATA_ROUTE_URL = "https://toranet.jp/_next/data/{build_id}{path}.json"
+# 求人一覧の各要素から読むキー（小文字・区切り文字なしで比較）
+# 汎用の "id" は地域・条件など求人以外の一覧にも含まれるため、求人に固有のキーのみとする
+JOB_ID_KEYS = ("jobid", "recruitid", "jobofferid", "kyujinid")
+JOB_URL_KEYS = ("detailurl", "url", "path", "href", "link")
+# 求人詳細ページのパス（パンくずリストなど、求人以外のリンクの一覧と区別する）
+DETAIL_HREF_PATTERN = re.compile(r'/job_detail/\d+/?(?:[?#]|$)')
+JOB_TITLE_KEYS = ("jobtitle", "title", "occupation", "jobname", "catchcopy")
+# 検索結果の総件数のキー
+TOTAL_COUNT_KEYS = ("totalcount", "total", "hitcount", "totalhits", "numfound", "count")
+# 探索する階層の深さの上限
+MAX_LISTING_DEPTH = 8
+
+# プロセス全体で共有するbuildId（デプロイで変わるため、データルートが使えなくなったら破棄する）
+# 検索結果ページのHTMLと同じ求人が取得できることを確認したbuildIdは verified に入れる
+# （バックグラウンドの複数の実行から読み書きするため、build_id_lock で排他する）
+build_id_cache = {"current": None, "failed": set(), "verified": set()}
+build_id_lock = threading.Lock()
+
+# Function to normalize a page data key for comparison
+def normalize_key(key):
+    return re.sub(r'[_\-]', '', key).lower()
+
+# Function to get the buildId from a page's embedded data (None if the page is not a Next.js page)
+def get_build_id(html_text):
+    data = load_next_data(html_text)
+    build_id = data.get("buildId") if data else None
+    return build_id if isinstance(build_id, str) and build_id else None
+
+# Function to get the buildId currently in use (None if there is none)
+def get_current_build_id():
+    with build_id_lock:
+        return build_id_cache["current"]
+
+# Function to check whether a buildId has been verified against the HTML pages
+def is_build_id_verified(build_id):
+    with build_id_lock:
+        return build_id in build_id_cache["verified"]
+
+# Function to remember the buildId seen on a page (returns it if its data routes have not failed before)
+def remember_build_id(build_id):
+    with build_id_lock:
+        if build_id is None or build_id in build_id_cache["failed"]:
+            return None
+        build_id_cache["current"] = build_id
+        return build_id
+
+# Function to stop using a buildId whose data routes do not work
+def forget_build_id(build_id):
+    with build_id_lock:
+        build_id_cache["failed"].add(build_id)
+        build_id_cache["verified"].discard(build_id)
+        if build_id_cache["current"] == build_id:
+            build_id_cache["current"] = None
+
+# Function to check the job links read through a data route against those of the same HTML page
+# (the buildId is trusted from then on if they agree, and dropped if not)
+def verify_build_id(build_id, route_links, html_links):
+    route_links = set(route_links)
+    html_links = set(html_links)
+    if html_links and route_links and (route_links <= html_links or html_links <= route_links):
+        with build_id_lock:
+            # 確認中に他の実行で使えないと分かったbuildIdは信頼しない
+            if build_id in build_id_cache["failed"]:
+                return False
+            build_id_cache["verified"].add(build_id)
+        return True
+    forget_build_id(build_id)
+    return False
+
+# Function to build the data route URL of a page
+def get_data_route_url(build_id, page_url):
+    path = urllib.parse.urlsplit(page_url).path.rstrip("/")
+    return DATA_ROUTE_URL.format(build_id=build_id, path=path)
+
+# Function to read the value of the first matching key of a record
+def get_record_value(record, keys):
+    normalized = {normalize_key(key): value for key, value in record.items() if isinstance(key, str)}
+    for key in keys:
+        if key in normalized and normalized[key] not in (None, "", [], {}):
+            return normalized[key]
+    return None
+
+# Function to check whether a list element identifies a job (a job-specific ID key or a detail page link)
+def is_job_item(item):
+    if not isinstance(item, dict):
+        return False
+    if get_record_value(item, JOB_ID_KEYS) is not None:
+        return True
+    href = get_record_value(item, JOB_URL_KEYS)
+    return isinstance(href, str) and bool(DETAIL_HREF_PATTERN.search(href))
+
+# Function to check whether a list looks like the job list of a search result
+def is_job_list(value):
+    return isinstance(value, list) and bool(value) and all(is_job_item(item) for item in value)
+
+# Function to find the job list and the total count in the page data (shallowest ones win)
+def find_job_list(page_props):
+    job_list = None
+    total = None
+    queue = deque([(page_props, 0)])
+    while queue and (job_list is None or total is None):
+        value, depth = queue.popleft()
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        for key, item in items:
+            if isinstance(key, str):
+                if SKIPPED_KEY_PATTERN.search(key):
+                    continue
+                if total is None and normalize_key(key) in TOTAL_COUNT_KEYS and isinstance(item, int) and not isinstance(item, bool):
+                    total = item
+                    continue
+            if job_list is None and is_job_list(item):
+                job_list = item
+                continue
+            if isinstance(item, (dict, list)) and depth < MAX_LISTING_DEPTH:
+                queue.append((item, depth + 1))
+    return job_list, total
+
+# Function to read a job list element as a job ID, link and listing card
+def parse_job_item(item):
+    job_id = get_record_value(item, JOB_ID_KEYS)
+    href = get_record_value(item, JOB_URL_KEYS)
+    card = {"text": " ".join(get_page_data_text(value) for value in item.values() if isinstance(value, str))[:1000]}
+    for field, keys in (
+        ("facility_name", PAGE_DATA_KEYS["facility_name"]),
+        ("job_title", JOB_TITLE_KEYS),
+        ("location", PAGE_DATA_KEYS["location"]),
+    ):
+        text = get_page_data_text(get_record_value(item, keys))
+        if text:
+            card[field] = text
+    return {
+        "job_id": str(job_id) if isinstance(job_id, (int, str)) and str(job_id).isdigit() else None,
+        "href": href if isinstance(href, str) else None,
+        "card": card,
+    }
+
+# Function to fetch a result page through its data route (returns the job items, total count and an error message)
+def fetch_listing_data(ctx, build_id, page_url):
+    url = get_data_route_url(build_id, page_url)
+    response, error = fetch_shared(ctx, "listing", url, lambda: make_request(ctx, url, max_retries=2))
+    if error:
+        return None, None, error
+    try:
+        data = response.json()
+    except ValueError:
+        return None, None, "データルートの応答がJSONではありません"
+    page_props = data.get("pageProps") if isinstance(data, dict) else None
+    if not isinstance(page_props, (dict, list)):
+        return None, None, "データルートの応答にページのデータがありません"
+    job_list, total = find_job_list(page_props)
+    if job_list is None:
+        # 総件数があれば、最終ページより後（求人なし）とみなす
+        if total is not None:
+            return [], total, None
+        return None, None, "データルートの応答に求人一覧がありません"
+    return [parse_job_item(item) for item in job_list], total, None
@@ -0,0 +1,69 @@
+# デバッグログ（リングバッファに記録し、必要に応じてJSONLファイルへまとめて書き出す）
+import json
+import threading
+import time
+from collections import deque
+
+# ログの重要度（表示順）
+LOG_LEVELS = ["info", "success", "warning", "error"]
+
+# Structured log of a scraping session, kept in a ring buffer
+class DebugLog:
+    def __init__(self, capacity=5000, path=None, flush_every=200):
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=capacity)
+        self._pending = []  # ファイルへ未書き出しのエントリ
+        self.dropped = 0  # リングバッファから押し出されたエントリ数
+
+    # Function to record an event (extra fields such as url are kept as-is)
+    def log(self, level, message, **fields):
+        entry = {"time": time.time(), "level": level, "message": message, **fields}
+        with self._lock:
+            if len(self._entries) == self._entries.maxlen:
+                self.dropped += 1
+            self._entries.append(entry)
+            if self.path:
+                self._pending.append(entry)
+                if len(self._pending) >= self.flush_every:
+                    self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in self._pending)
+        except OSError:
+            pass
+        self._pending.clear()
+
+    # Function to write pending entries to the JSONL file
+    def flush(self):
+        with self._lock:
+            if self.path:
+                self._flush_locked()
+            else:
+                self._pending.clear()
+
+    # Function to get the entries matching the levels and the search text
+    def entries(self, levels=None, text=None):
+        with self._lock:
+            entries = list(self._entries)
+        if levels is not None:
+            entries = [entry for entry in entries if entry["level"] in levels]
+        if text:
+            entries = [entry for entry in entries if text in entry["message"] or text in entry.get("url", "")]
+        return entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Function to clear the buffer (entries already written to the file are kept there)
+    def clear(self):
+        with self._lock:
+            if self.path:
+                self._flush_locked()
+            self._entries.clear()
+            self.dropped = 0
@@ -0,0 +1,98 @@
+# 類似求人の検出（SimHash）
+import hashlib
+import re
+from collections import Counter
+
+# SimHashの設定（64ビット、ハミング距離7以内を類似とみなす）
+SIMHASH_MAX_DISTANCE = 7
+SIMHASH_MIN_TEXT_LENGTH = 30
+
+# Function to compute a 64-bit SimHash signature of a text (character 3-grams)
+def simhash(text, shingle_size=3):
+    import numpy as np
+    
+    # 空白を除去し、数字（時刻・給与・日付など）はすべて同一視する
+    text = re.sub(r'\s+', '', text or "")
+    text = re.sub(r'[0-9０-９]', '#', text)
+    # 短すぎるテキストは誤検出の原因になるため対象外
+    if len(text) < SIMHASH_MIN_TEXT_LENGTH:
+        return None
+    
+    shingles = Counter(text[i:i + shingle_size] for i in range(len(text) - shingle_size + 1))
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little") for shingle in shingles],
+        dtype=np.uint64
+    )
+    weights = np.fromiter(shingles.values(), dtype=np.int64, count=len(shingles))
+    
+    # 各ビットについて、立っていれば+重み、立っていなければ-重みを合計
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    totals = weights @ (bits.astype(np.int64) * 2 - 1)
+    return int(np.packbits(totals > 0, bitorder="little").view(np.uint64)[0])
+
+# Index of SimHash signatures for near-duplicate lookup
+class NearDuplicateIndex:
+    # 64ビットを8ビット×8のバンドに分割（距離7以内なら少なくとも1バンドが一致する）
+    BANDS = 8
+    
+    def __init__(self, max_distance=SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands = [{} for _ in range(self.BANDS)]
+    
+    def _band_keys(self, signature):
+        return [(signature >> (8 * band)) & 0xFF for band in range(self.BANDS)]
+    
+    def find(self, signature):
+        for band, key in enumerate(self._band_keys(signature)):
+            for candidate, group in self._bands[band].get(key, []):
+                if bin(candidate ^ signature).count("1") <= self.max_distance:
+                    return group
+        return None
+    
+    def add(self, signature, group):
+        for band, key in enumerate(self._band_keys(signature)):
+            self._bands[band].setdefault(key, []).append((signature, group))
+
+# Tracker that collapses near-duplicate postings into groups
+class DuplicateTracker:
+    def __init__(self, job_cards):
+        self.job_cards = job_cards
+        # カード・業務内容の比較は同じ施設の求人同士でのみ行う（施設名 → インデックス）
+        # カードは同じテンプレートで作られるため、施設をまたいで比較すると別の施設の求人も類似と判定される
+        self.card_indexes = {}
+        self.description_indexes = {}
+        self.groups = {}  # グループID → 求人URLのリスト
+        self.skipped = 0
+    
+    # Function to get the card signature and the card index of its facility (None, None if the card has no facility name)
+    def _card_lookup(self, link):
+        card = self.job_cards.get(link, {})
+        if not card.get("facility_name"):
+            return None, None
+        signature = simhash(card.get("text"))
+        return signature, self.card_indexes.setdefault(card["facility_name"], NearDuplicateIndex())
+    
+    def match_card(self, link):
+        # 同じ施設の取得済みの求人とカードの内容がほぼ同じであれば、そのグループに追加
+        signature, card_index = self._card_lookup(link)
+        group = card_index.find(signature) if signature is not None else None
+        if group is not None:
+            self.groups[group].append(link)
+            self.skipped += 1
+        return group
+    
+    def assign(self, job):
+        signature = simhash(job["job_description"])
+        description_index = self.description_indexes.setdefault(job["facility_name"], NearDuplicateIndex())
+        group = description_index.find(signature) if signature is not None else None
+        if group is None:
+            group = len(self.groups)
+            self.groups[group] = []
+            if signature is not None:
+                description_index.add(signature, group)
+        self.groups[group].append(job["source_url"])
+        
+        card_signature, card_index = self._card_lookup(job["source_url"])
+        if card_signature is not None and card_index.find(card_signature) is None:
+            card_index.add(card_signature, group)
+        return group
@@ -0,0 +1,712 @@
+# 求人詳細ページの取得と項目抽出
+import random
+import re
+
+import streamlit as st
+
+from scraper.context import ScrapeContext
+from scraper.facility_cache import get_facility_key, lookup_facility_fields, remember_facility_fields
+from scraper.fetch import fetch_shared, is_valid_job_url, make_request, read_streamed_body, wait_between_requests
+from scraper.layouts import match_layout_plan
+from scraper.page_data import NON_RECORD_FIELDS, extract_page_data_fields, has_required_page_data
+from scraper.streaming import read_detail_sections
+from scraper.text import (
+    clean_facility_name, extract_address, extract_phone_number, extract_representative, format_phone_digits,
+    is_valid_facility_name
+)
+from scraper.ui import display_html_response
+
+# 施設に固有のセレクタ（これらで取得した施設名のみ、施設情報のキャッシュのキーに使う）
+FACILITY_SPECIFIC_SELECTORS = {'div.corpNameWrap > span', 'div.corpName', 'h1.company-name', 'div.company-name', '.corp-name'}
+
+# Function to scrape job details
+def get_job_details(ctx, detail_url, defer_retries=False):
+    # Validate URL before processing
+    if not is_valid_job_url(ctx, detail_url):
+        return None, f"無効な詳細ページURL: {detail_url}"
+    
+    # 他の実行が同じ求人を取得中であれば、その取得・抽出結果を共有する
+    job_details, error = fetch_shared(ctx, "detail", detail_url, lambda: fetch_job_details(ctx, detail_url, defer_retries))
+    # 呼び出し側で項目を書き換えるため、共有した結果は実行ごとに別の辞書として返す
+    return (dict(job_details) if job_details else job_details), error
+
+# Function to fetch a detail page and extract the job details
+def fetch_job_details(ctx, detail_url, defer_retries=False):
+    # Add a slight delay before making the next request
+    wait_between_requests(ctx, random.uniform(0.3, 1.0))
+    
+    response, error = make_request(ctx, detail_url, defer_retries=defer_retries, stream=ctx.stream_details)
+    if error:
+        return None, error
+    
+    # ストリーミング取得では、抽出する項目がそろった時点で残りのダウンロードを打ち切り、読み込んだ部分から抽出する
+    if ctx.stream_details:
+        body, error = read_streamed_body(
+            ctx, detail_url, response, lambda response: read_detail_sections(ctx, response, detail_url), defer_retries
+        )
+        if error:
+            return None, error
+        content, html_text, truncated = body
+        # 途中で打ち切った本体はその旨を記録し、アーカイブからの再抽出の対象外とする
+        if ctx.archive_pages and ctx.archive is not None:
+            ctx.archive.append(detail_url, content, response.status_code, response.encoding, truncated=truncated)
+        display_html_response(ctx, response, "詳細ページ", html_text)
+        return extract_job_details(ctx, html_text, detail_url)
+    
+    # Display HTML for debugging
+    display_html_response(ctx, response, "詳細ページ")
+    
+    try:
+        return extract_job_details(ctx, response.text, detail_url)
+    finally:
+        # 省メモリクロールではレスポンス本体を抽出直後に解放
+        if ctx.bounded_memory:
+            response.close()
+
+# Function to shorten a job description for the table
+def get_short_description(job_description):
+    return job_description[:100] + "..." if len(job_description) > 100 else job_description
+
+# Function to clean up an extracted location (facility name, label prefixes and following sections removed)
+def clean_extracted_location(location, facility_name):
+    # 会社名が勤務地に含まれているかチェック
+    if location and facility_name and facility_name != "情報なし" and facility_name in location:
+        # 会社名を最初に分離
+        parts = location.split(facility_name)
+        if len(parts) > 1:
+            # 会社名の後のテキストを勤務地として使用
+            location = parts[1].strip()
+            # 先頭の余分な文字（コロンなど）を削除
+            location = re.sub(r'^[、,:：\s]+', '', location)
+    
+    # 勤務地: などのプレフィックスを削除
+    location = re.sub(r'^勤務地[：:]\s*', '', location)
+    location = re.sub(r'^所在地[：:]\s*', '', location)
+    location = re.sub(r'^住所[：:]\s*', '', location)
+    
+    # 余分な情報が続く場合は切り捨て
+    location = re.sub(r'代表電話.*$', '', location)
+    location = re.sub(r'事業内容.*$', '', location)
+    location = re.sub(r'応募情報.*$', '', location)
+    location = re.sub(r'選考プロセス.*$', '', location)
+    
+    # 最終的なクリーニング
+    return location.strip()
+
+# Function to clean up an extracted representative name (addresses, phone numbers and following sections removed)
+def clean_extracted_representative(representative):
+    if not representative:
+        return representative
+    # 余分な情報を削除
+    representative = re.sub(r'所在住所.*$', '', representative)
+    representative = re.sub(r'住所.*$', '', representative)
+    representative = re.sub(r'[0-9０-９]{5,}.*$', '', representative)
+    representative = re.sub(r'東京都.*$', '', representative)
+    representative = re.sub(r'大阪府.*$', '', representative)
+    representative = re.sub(r'神奈川県.*$', '', representative)
+    representative = re.sub(r'埼玉県.*$', '', representative)
+    representative = re.sub(r'千葉県.*$', '', representative)
+    representative = re.sub(r'代表電話.*$', '', representative)
+    representative = re.sub(r'事業内容.*$', '', representative)
+    representative = re.sub(r'応募情報.*$', '', representative)
+    representative = re.sub(r'選考プロセス.*$', '', representative)
+    
+    # 最終的なクリーニング
+    return representative.strip()
+
+# Function to build a job record from the extracted fields
+def build_job_record(facility_name, representative, location, phone_number, job_description, detail_url):
+    return {
+        "facility_name": facility_name,
+        "representative": clean_extracted_representative(representative),
+        "location": location,  # 「所在住所」から「勤務地」に変更
+        "phone_number": phone_number,
+        "job_description": job_description,
+        "short_description": get_short_description(job_description),
+        "source_url": detail_url
+    }
+
+# Function to build a job record from the embedded page data alone
+def build_page_data_record(ctx, fields, detail_url):
+    for field in ("facility_name", "representative", "location", "phone_number", "job_description"):
+        ctx.selector_stats.record(field, "page_data", field in fields)
+    facility_name = fields.get("facility_name") or "情報なし"
+    # 埋め込みデータにない代表者・電話番号は、同じ施設の求人で取得済みの値を使う
+    facility_key = get_facility_key(facility_name, fields.get("facility_id"))
+    fields = {**fields, **lookup_facility_fields(ctx, facility_key, fields, detail_url)}
+    remember_facility_fields(ctx, facility_key, fields.get("representative", ""), fields.get("phone_number", "情報なし"))
+    return build_job_record(
+        facility_name,
+        fields.get("representative", ""),
+        clean_extracted_location(fields.get("location", ""), facility_name),
+        fields.get("phone_number", "情報なし"),
+        fields.get("job_description", "情報なし"),
+        detail_url,
+    )
+
+# Function to extract job details from a detail page's HTML
+def extract_job_details(ctx, html_text, detail_url):
+    from bs4 import BeautifulSoup
+    
+    soup = None
+    try:
+        # ページに埋め込まれたデータから主要な項目がそろえば、HTMLのツリーを作らずに求人レコードを作る
+        # レイアウトのフィンガープリントは、埋め込みデータを使う場合もサイトの変更の検出のために記録する
+        plan = match_layout_plan(ctx, html_text, detail_url)
+        page_fields, generic_fields = extract_page_data_fields(html_text)
+        if has_required_page_data(page_fields, generic_fields):
+            return build_page_data_record(ctx, page_fields, detail_url), None
+        
+        soup = BeautifulSoup(html_text, 'html.parser')
+        
+        # 既知のレイアウトであれば抽出プランで直接取得し、不足分のみ汎用処理で補う
+        planned = plan["extract"](soup) if plan else {}
+        for field in planned:
+            ctx.selector_stats.record(field, f"layout:{plan['name']}", True)
+        # 埋め込みデータから求人に固有のキーで取得できた項目はそれを優先する（汎用のキーの値はHTMLから抽出し直す）
+        for field, value in page_fields.items():
+            if field in generic_fields or field in NON_RECORD_FIELDS:
+                continue
+            planned[field] = value
+            ctx.selector_stats.record(field, "page_data", True)
+        
+        # Debug - output all div classes to help identify correct selectors
+        if ctx.debug_mode and ctx.show_html:
+            with st.expander("ページ内のdiv要素のクラス一覧"):
+                divs = soup.find_all('div', class_=True)
+                for i, div in enumerate(divs[:30]):  # Limit to first 30 to avoid clutter
+                    st.write(f"{i+1}. Class: {div.get('class')} - テキスト: {div.text[:50]}")
+            
+            # Also show all headings
+            with st.expander("ページ内の見出し要素"):
+                headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+                for i, h in enumerate(headings):
+                    st.write(f"{i+1}. {h.name}: {h.text.strip()}")
+        
+        # Extract facility name - try multiple selectors
+        facility_name = planned.get("facility_name", "情報なし")
+        # 埋め込みデータ・施設に固有のセレクタで取得した施設名か（見出し・タイトルなどからの推定は別の施設と重なりうる）
+        facility_name_is_specific = facility_name != "情報なし"
+        facility_name_selectors = [
+            'div.corpNameWrap > span', 
+            'div.corpName', 
+            'h1.company-name',
+            'div.company-name',
+            'h1', # Try any h1 tag
+            'h2', # Try any h2 tag
+            'div.corpInfo', # Try corporation info div
+            'span.name', # Try name span
+            '.corp-name', # Try corp-name class
+            '.company' # Try company class
+        ]
+        
+        if facility_name == "情報なし":
+            for selector in ctx.selector_stats.order("facility_name", facility_name_selectors):
+                facility_name_element = soup.select_one(selector)
+                # 施設名から不要なテキストを削除し、求人のタイトルなど施設名でない値は次のセレクタを試す
+                name = clean_facility_name(facility_name_element.text.strip()) if facility_name_element else None
+                valid = name is not None and is_valid_facility_name(name)
+                ctx.selector_stats.record("facility_name", selector, valid, rejected=facility_name_element is not None and not valid)
+                if valid:
+                    facility_name = name
+                    facility_name_is_specific = selector in FACILITY_SPECIFIC_SELECTORS
+                    if ctx.debug_mode and ctx.show_html:
+                        ctx.log("success", f"施設名が見つかりました（セレクタ: {selector}）", url=detail_url)
+                    break
+        
+        # Fallback: Try to find text that looks like a company name (often near the top of the page)
+        if facility_name == "情報なし":
+            # Look for text that might be a company name (often near the top of the page)
+            top_elements = soup.find_all(['div', 'span', 'p'], limit=20)
+            for elem in top_elements:
+                text = elem.text.strip()
+                # Company names typically aren't very long and don't contain certain patterns
+                if 5 < len(text) < 50 and ('株式会社' in text or '有限会社' in text or '病院' in text or 'クリニック' in text):
+                    facility_name = text
+                    # 施設名から不要なテキストを削除
+                    facility_name = clean_facility_name(facility_name)
+                    if ctx.debug_mode and ctx.show_html:
+                        ctx.log("success", f"テキストパターンから施設名を検出: {text}", url=detail_url)
+                    break
+            ctx.selector_stats.record("facility_name", "text_pattern", facility_name != "情報なし")
+            
+            # さらにタイトルから施設名を抽出（最終手段）
+            if facility_name == "情報なし":
+                title_tag = soup.find('title')
+                if title_tag:
+                    title_text = title_tag.text.strip()
+                    # よくあるタイトルパターン "求人 - 会社名" や "会社名の求人詳細"
+                    for separator in ['|', '-', '：', ':', '／', '/']: 
+                        if separator in title_text:
+                            parts = title_text.split(separator)
+                            for part in parts:
+                                part = part.strip()
+                                if 5 < len(part) < 50 and not re.search(r'求人|募集|採用|とらばーゆ|転職', part):
+                                    facility_name = part
+                                    # 施設名から不要なテキストを削除
+                                    facility_name = clean_facility_name(facility_name)
+                                    if ctx.debug_mode and ctx.show_html:
+                                        ctx.log("success", f"タイトルから施設名を検出: {part}", url=detail_url)
+                                    break
+                            if facility_name != "情報なし":
+                                break
+                    
+                    # セパレータがない場合はタイトル全体から余計な部分を削除
+                    if facility_name == "情報なし":
+                        # 「求人」「募集」などの単語を削除
+                        cleaned_title = re.sub(r'(求人|募集|採用|詳細)(情報)?', '', title_text)
+                        cleaned_title = clean_facility_name(cleaned_title)
+                        if 5 < len(cleaned_title) < 50:
+                            facility_name = cleaned_title
+                            if ctx.debug_mode and ctx.show_html:
+                                ctx.log("success", f"クリーニングしたタイトルから施設名を検出: {cleaned_title}", url=detail_url)
+                ctx.selector_stats.record("facility_name", "title", facility_name != "情報なし")
+        
+        # 同じ施設の求人で取得済みの代表者・電話番号があれば、それらの抽出処理を省く
+        facility_key = get_facility_key(facility_name if facility_name_is_specific else None, page_fields.get("facility_id"))
+        for field, value in lookup_facility_fields(ctx, facility_key, planned, detail_url).items():
+            planned[field] = value
+            ctx.selector_stats.record(field, "facility_cache", True)
+        
+        # Extract representative name using label-based approach
+        representative = planned.get("representative", "")
+        
+        if not representative:
+            # 0. HTMLクラスベースでの代表者検出（提供されたソースコードに基づく）
+            representative_elements = soup.select('p.styles_content__HWIR6')
+            for element in representative_elements:
+                # 前の要素が「代表者」を含むh3であるかチェック
+                prev_el = element.find_previous()
+                if prev_el and prev_el.name == 'h3' and '代表者' in prev_el.text:
+                    # p要素の中身が空でないことを確認（空の場合は代表者なし）
+                    content = element.text.strip()
+                    if content and content != "者" and len(content) > 1:
+                        if not re.search(r'[】］）】\])]$', content) and content != "名" and "名】" not in content:
+                            # 余分な情報を削除
+                            content = re.sub(r'所在住所.*$', '', content)
+                            content = re.sub(r'住所.*$', '', content)
+                            content = re.sub(r'[0-9０-９]{5,}.*$', '', content)
+                            content = re.sub(r'東京都.*$', '', content)
+                            content = re.sub(r'大阪府.*$', '', content)
+                            content = re.sub(r'神奈川県.*$', '', content)
+                            content = re.sub(r'埼玉県.*$', '', content)
+                            content = re.sub(r'千葉県.*$', '', content)
+                            content = re.sub(r'代表電話.*$', '', content)
+                            content = re.sub(r'事業内容.*$', '', content)
+                        
+                            # 最終的なクリーニング
+                            content = content.strip()
+                            if len(content) > 1:
+                                representative = content
+                            
+                            if ctx.debug_mode and ctx.show_html:
+                                ctx.log("success", f"HTMLクラスから代表者を検出: {representative}", url=detail_url)
+                    # 明示的に空のp要素を検出した場合は、代表者なしと判断してループを抜ける
+                    break
+            ctx.selector_stats.record("representative", "html_class", bool(representative))
+        
+        # 1. 企業情報セクションを優先的に探す
+        company_info_sections = []
+        if not representative:
+            company_info_sections = soup.find_all(['div', 'section'], string=lambda s: s and '企業情報' in s)
+            company_info_sections += soup.find_all(['div', 'section'], class_=lambda c: c and ('company' in c or 'corp' in c))
+            
+            for section in company_info_sections:
+                # セクション内で代表者情報を探す
+                rep_labels = section.find_all(string=re.compile('代表者|代表取締役|院長|理事長'))
+                for label in rep_labels:
+                    parent = label.parent
+                    # 隣接要素を探す
+                    siblings = list(parent.next_siblings)
+                    for sibling in siblings[:3]:  # 最初の3つの兄弟要素のみチェック
+                        if hasattr(sibling, 'text') and sibling.text.strip():
+                            name = sibling.text.strip()
+                            if name and name != "者" and len(name) > 1:
+                                if not re.search(r'[】］）】\])]$', name) and name != "名" and "名】" not in name:
+                                    representative = name
+                                    if ctx.debug_mode and ctx.show_html:
+                                        ctx.log("success", f"企業情報セクションから代表者を検出: {representative}", url=detail_url)
+                                    break
+                
+                    if representative:
+                        break
+            ctx.selector_stats.record("representative", "company_section", bool(representative))
+        
+        # 2. If still not found, try generic extraction from the page
+        if not representative:
+            # Try table-based extraction
+            tables = soup.find_all('table')
+            for table in tables:
+                rows = table.find_all('tr')
+                for row in rows:
+                    cells = row.find_all(['th', 'td'])
+                    if len(cells) >= 2:
+                        header = cells[0].text.strip()
+                        if '代表者' in header:
+                            name = cells[1].text.strip()
+                            # 不適切な値をチェック
+                            if name and name != "者" and len(name) > 1:
+                                if not re.search(r'[】］）】\])]$', name) and name != "名" and "名】" not in name:
+                                    representative = name
+                                    if ctx.debug_mode and ctx.show_html:
+                                        ctx.log("success", f"テーブルから代表者を検出: {representative}", url=detail_url)
+                                    break
+            ctx.selector_stats.record("representative", "table", bool(representative))
+        
+        # 3. Last resort: use regex on entire page text
+        if not representative:
+            page_text = soup.get_text()
+            extracted = extract_representative(page_text)
+            if extracted:
+                representative = extracted
+                if ctx.debug_mode and ctx.show_html:
+                    ctx.log("success", f"ページ全体から代表者を検出: {representative}", url=detail_url)
+            ctx.selector_stats.record("representative", "page_text", bool(representative))
+        
+        # Extract address using label-based approach - now looking for "勤務地" instead of "所在住所"
+        location = planned.get("location", "")
+        
+        if not location:
+            # 0. HTMLクラスベースでの勤務地検出
+            location_elements = soup.select('p.styles_content__HWIR6')
+            for element in location_elements:
+                # 前の要素が「勤務地」を含むh3であるかチェック
+                prev_el = element.find_previous()
+                if prev_el and prev_el.name == 'h3' and '勤務地' in prev_el.text:
+                    # p要素の中身が空でないことを確認
+                    content = element.text.strip()
+                    if content and len(content) > 5:  # 勤務地として十分な長さがあるか
+                        location = content
+                        if ctx.debug_mode and ctx.show_html:
+                            ctx.log("success", f"HTMLクラスから勤務地を検出: {location}", url=detail_url)
+                        break
+            ctx.selector_stats.record("location", "html_class", bool(location))
+        
+        # 1. 企業情報セクションを優先的に探す
+        if not location and len(company_info_sections) > 0:
+            for section in company_info_sections:
+                # セクション内で勤務地情報を探す
+                addr_labels = section.find_all(string=re.compile('勤務地|所在地|所在住所|住所'))
+                for label in addr_labels:
+                    parent = label.parent
+                    # 隣接要素を探す
+                    siblings = list(parent.next_siblings)
+                    for sibling in siblings[:3]:  # 最初の3つの兄弟要素のみチェック
+                        if hasattr(sibling, 'text') and sibling.text.strip():
+                            addr_text = sibling.text.strip()
+                            if addr_text and len(addr_text) > 5:  # 住所として十分な長さがあるか
+                                location = addr_text
+                                if ctx.debug_mode and ctx.show_html:
+                                    ctx.log("success", f"企業情報セクションから勤務地を検出: {location}", url=detail_url)
+                                break
+                    
+                    if location:
+                        break
+                
+                if location:
+                    break
+            ctx.selector_stats.record("location", "company_section", bool(location))
+        
+        # 2. Look for elements containing "勤務地" or "所在地" labels
+        if not location:
+            addr_elements = soup.find_all(string=re.compile("勤務地|所在地|所在住所"))
+            for element in addr_elements:
+                parent = element.parent
+                
+                # Check if the text is exactly the label (or close to it)
+                if re.match(r'^(勤務地|所在地|所在住所)[:：]?$', element.strip()):
+                    # 1-a. Try to find next sibling that contains the address
+                    next_sibling = parent.next_sibling
+                    if next_sibling and hasattr(next_sibling, 'text') and next_sibling.text.strip():
+                        location = next_sibling.text.strip()
+                        if ctx.debug_mode and ctx.show_html:
+                            ctx.log("success", f"勤務地ラベルの次の要素から勤務地を検出: {location}", url=detail_url)
+                        break
+                    
+                    # 1-b. Try to find next element in parent
+                    next_element = parent.find_next()
+                    if next_element and next_element.text.strip():
+                        location = next_element.text.strip()
+                        if ctx.debug_mode and ctx.show_html:
+                            ctx.log("success", f"勤務地ラベルの親要素の次の要素から勤務地を検出: {location}", url=detail_url)
+                        break
+                
+                # 2. Parent might contain both label and value
+                parent_text = parent.text.strip()
+                extracted = extract_address(parent_text)
+                if extracted:
+                    location = extracted
+                    if ctx.debug_mode and ctx.show_html:
+                        ctx.log("success", f"勤務地ラベルを含む要素から勤務地を抽出: {location}", url=detail_url)
+                    break
+            ctx.selector_stats.record("location", "label", bool(location))
+        
+        # 3. If still not found, try table-based extraction
+        if not location:
+            tables = soup.find_all('table')
+            for table in tables:
+                rows = table.find_all('tr')
+                for row in rows:
+                    cells = row.find_all(['th', 'td'])
+                    if len(cells) >= 2:
+                        header = cells[0].text.strip()
+                        if '勤務地' in header or '所在地' in header or '所在住所' in header or '住所' in header:
+                            location = cells[1].text.strip()
+                            if ctx.debug_mode and ctx.show_html:
+                                ctx.log("success", f"テーブルから勤務地を検出: {location}", url=detail_url)
+                            break
+            ctx.selector_stats.record("location", "table", bool(location))
+        
+        # 4. Last resort: use regex on entire page text
+        if not location:
+            page_text = soup.get_text()
+            extracted = extract_address(page_text)
+            if extracted:
+                location = extracted
+                if ctx.debug_mode and ctx.show_html:
+                    ctx.log("success", f"ページ全体から勤務地を検出: {location}", url=detail_url)
+            ctx.selector_stats.record("location", "page_text", bool(location))
+        
+        location = clean_extracted_location(location, facility_name)
+        
+        # Extract phone number
+        phone_number = planned.get("phone_number", "情報なし")
+        
+        if phone_number == "情報なし":
+            # 0. HTMLクラスベースでの電話番号検出
+            phone_elements = soup.select('p.styles_content__HWIR6')
+            for element in phone_elements:
+                # 前の要素が「代表電話番号」を含むh3であるかチェック
+                prev_el = element.find_previous()
+                if prev_el and prev_el.name == 'h3' and ('代表電話番号' in prev_el.text or '電話番号' in prev_el.text or 'TEL' in prev_el.text.upper()):
+                    # p要素の中身が空でないことを確認
+                    content = element.text.strip()
+                    if ctx.debug_mode and ctx.show_html:
+                        ctx.log("info", f"電話番号候補（HTMLクラス）: {content}", url=detail_url)
+                    if content:
+                        # 数字のみを抽出
+                        digits = re.sub(r'[^\d]', '', content)
+                        if digits:
+                            # 桁数に基づいて適切なフォーマットを適用
+                            phone_number = format_phone_digits(digits)
+                        
+                            if ctx.debug_mode and ctx.show_html:
+                                ctx.log("success", f"HTMLクラスから代表電話番号を検出: {phone_number}", url=detail_url)
+                            break
+            ctx.selector_stats.record("phone_number", "html_class", phone_number != "情報なし")
+
+        # もう一つのアプローチ: h3タグ「代表電話番号」の次にあるpタグを直接検索
+        if phone_number == "情報なし":
+            tel_headers = soup.find_all('h3', string=lambda s: s and ('代表電話番号' in s or '電話番号' in s or 'TEL' in s.upper()))
+            for header in tel_headers:
+                # 次の兄弟要素を取得
+                next_elem = header.find_next()
+                if next_elem and next_elem.name == 'p':
+                    content = next_elem.text.strip()
+                    if content:
+                        # 数字のみを抽出
+                        digits = re.sub(r'[^\d]', '', content)
+                        if digits:
+                            # 桁数に基づいて適切なフォーマットを適用
+                            phone_number = format_phone_digits(digits)
+                            
+                            if ctx.debug_mode and ctx.show_html:
+                                ctx.log("success", f"h3タグの次のpタグから代表電話番号を検出: {phone_number}", url=detail_url)
+                            break
+            ctx.selector_stats.record("phone_number", "h3_next_p", phone_number != "情報なし")
+
+        # テーブル構造から電話番号を検索 - 「代表電話番号」というラベルを持つthの隣接tdを検索
+        if phone_number == "情報なし":
+            tel_th_elements = soup.find_all('th', string=lambda s: s and ('代表電話番号' in s or '電話番号' in s or 'TEL' in s.upper()))
+            for th in tel_th_elements:
+                # 隣接するtd要素を取得
+                td = th.find_next_sibling('td')
+                if td:
+                    content = td.text.strip()
+                    if content:
+                        # 数字のみを抽出
+                        digits = re.sub(r'[^\d]', '', content)
+                        if digits:
+                            # 桁数に基づいて適切なフォーマットを適用
+                            phone_number = format_phone_digits(digits)
+                            
+                            if ctx.debug_mode and ctx.show_html:
+                                ctx.log("success", f"テーブル構造から代表電話番号を検出: {phone_number}", url=detail_url)
+                            break
+            ctx.selector_stats.record("phone_number", "table", phone_number != "情報なし")
+
+        # 一般的なセレクタによる検索
+        if phone_number == "情報なし":
+            phone_selectors = [
+                'div.tel', 
+                'div.phone',
+                'span.tel',
+                'span.phone',
+                'p.tel',
+                'a[href^="tel:"]',
+                'div.contact',
+                'div.telNo',
+                'p:contains("TEL")',
+                'div:contains("TEL")',
+                'p:contains("電話")',
+                'div:contains("電話")'
+            ]
+            
+            for selector in ctx.selector_stats.order("phone_number", phone_selectors):
+                phone_elements = soup.select(selector)
+                for element in phone_elements:
+                    element_text = element.text.strip()
+                    extracted_number = extract_phone_number(element_text)
+                    if extracted_number:
+                        phone_number = extracted_number
+                        if ctx.debug_mode and ctx.show_html:
+                            ctx.log("success", f"電話番号が見つかりました（セレクタ: {selector}）: {phone_number}", url=detail_url)
+                        break
+                ctx.selector_stats.record("phone_number", selector, phone_number != "情報なし", rejected=bool(phone_elements))
+                if phone_number != "情報なし":
+                    break
+
+        # If not found, search in the entire page text
+        if phone_number == "情報なし":
+            # Look for phone number in the entire page
+            page_text = soup.get_text()
+            extracted_number = extract_phone_number(page_text)
+            if extracted_number:
+                phone_number = extracted_number
+                if ctx.debug_mode and ctx.show_html:
+                    ctx.log("success", f"ページ全体から電話番号を検出: {phone_number}", url=detail_url)
+            ctx.selector_stats.record("phone_number", "page_text", phone_number != "情報なし")
+        
+        remember_facility_fields(ctx, facility_key, representative, phone_number)
+        
+        # Extract job description - try multiple selectors
+        job_description = planned.get("job_description", "情報なし")
+        
+        if job_description == "情報なし":
+            # 1. 「職種/仕事内容」セクションから情報を抽出
+            job_sections = soup.find_all('h3', string=lambda s: s and ('職種/仕事内容' in s or '仕事内容' in s))
+            for section in job_sections:
+                # 親要素を取得
+                parent_th = section.find_parent('th')
+                if parent_th:
+                    # 隣接するtd要素を取得
+                    td = parent_th.find_next_sibling('td')
+                    if td:
+                        content = td.text.strip()
+                        if content:
+                            job_description = content
+                            if ctx.debug_mode and ctx.show_html:
+                                ctx.log("success", f"「職種/仕事内容」セクションから業務内容を検出: {content[:100]}...", url=detail_url)
+                            break
+            ctx.selector_stats.record("job_description", "heading_section", job_description != "情報なし")
+        
+        # 2. styles_content__cGhMI クラスを持つ要素から抽出（特定のクラス名を使用）
+        if job_description == "情報なし":
+            job_content_elements = soup.select('td.styles_content__cGhMI.styles_commonContent__NDgRD.styles_recruitCol__rbAHs')
+            for element in job_content_elements:
+                # 前の要素（th）に「職種/仕事内容」が含まれているか確認
+                prev_th = element.find_previous('th')
+                if prev_th and prev_th.find('p') and ('職種/仕事内容' in prev_th.text or '仕事内容' in prev_th.text):
+                    content = element.text.strip()
+                    if content:
+                        job_description = content
+                        if ctx.debug_mode and ctx.show_html:
+                            ctx.log("success", f"styles_content__cGhMI クラスから業務内容を検出: {content[:100]}...", url=detail_url)
+                        break
+            ctx.selector_stats.record("job_description", "recruit_col", job_description != "情報なし")
+        
+        # 3. もともとあった様々なセレクタを使った検索方法（フォールバック）
+        if job_description == "情報なし":
+            description_selectors = [
+                'div.jobDtlText.jobIntro', 
+                'div.job-description', 
+                'div.description',
+                'div[class*="job"][class*="description"]',
+                'div[class*="description"]',
+                'div.jobDetail',
+                'div.jobContent',
+                'div.kyujin-detail',
+                'section.detail',
+                'div.detail-content',
+                'div.job-content'
+            ]
+            
+            for selector in ctx.selector_stats.order("job_description", description_selectors):
+                job_description_elements = soup.select(selector)
+                # Combine all matching elements
+                combined_text = "\n\n".join([elem.text.strip() for elem in job_description_elements])
+                ctx.selector_stats.record("job_description", selector, bool(combined_text), rejected=bool(job_description_elements))
+                if job_description_elements:
+                    if combined_text:
+                        job_description = combined_text
+                        if ctx.debug_mode and ctx.show_html:
+                            ctx.log("success", f"業務内容が見つかりました（セレクタ: {selector}）", url=detail_url)
+                        break
+        
+        # 4. Enhanced fallback mechanism for job description
+        if job_description == "情報なし":
+            # Try to find sections with job-related keywords
+            keywords = ['仕事内容', '業務内容', '職務内容', 'お仕事', '職種']
+            
+            # First look for headings with these keywords
+            for keyword in keywords:
+                elements = soup.find_all(string=re.compile(keyword))
+                if elements:
+                    # For each element containing the keyword, look for nearby content
+                    for element in elements:
+                        parent = element.parent
+                        # Try to get content from the next sibling or parent's next sibling
+                        content = None
+                        if parent.next_sibling:
+                            content = parent.next_sibling
+                        elif parent.parent and parent.parent.next_sibling:
+                            content = parent.parent.next_sibling
+                        
+                        if content and hasattr(content, 'text'):
+                            job_description = content.text.strip()
+                            if ctx.debug_mode and ctx.show_html:
+                                ctx.log("success", f"キーワード '{keyword}' から業務内容を検出", url=detail_url)
+                            break
+                
+                if job_description != "情報なし":
+                    break
+            ctx.selector_stats.record("job_description", "keyword", job_description != "情報なし")
+            
+            # If still not found, try to look for any substantial text blocks
+            if job_description == "情報なし":
+                main_content_divs = soup.select('div.main-content, div.content, div.detail, div.job, article, section')
+                for div in main_content_divs:
+                    paragraphs = div.find_all(['p', 'div'], class_=lambda c: c and ('text' in c or 'content' in c))
+                    if paragraphs:
+                        job_description = "\n\n".join([p.text.strip() for p in paragraphs])
+                        if ctx.debug_mode and ctx.show_html:
+                            ctx.log("success", "フォールバック方法で業務内容のテキストを抽出しました", url=detail_url)
+                        break
+                ctx.selector_stats.record("job_description", "text_blocks", job_description != "情報なし")
+        
+        # Get a shorter version of the job description for the table
+        short_description = get_short_description(job_description)
+        
+        # Debug information - only show for HTML debug mode
+        if ctx.debug_mode and ctx.show_html:
+            ctx.log(
+                "info",
+                f"抽出結果 施設名：{facility_name} / 代表者：{representative if representative else '(情報なし)'} / "
+                f"勤務地：{location if location else '(情報なし)'} / 電話番号：{phone_number} / 業務内容：{short_description}",
+                url=detail_url
+            )
+        
+        return build_job_record(facility_name, representative, location, phone_number, job_description, detail_url), None
+    except Exception as e:
+        import traceback
+        ctx.log("error", f"詳細情報の解析中にエラーが発生しました: {str(e)}", url=detail_url, traceback=traceback.format_exc())
+        return None, f"詳細情報の解析中にエラーが発生しました: {str(e)}"
+    finally:
+        # 省メモリクロールではツリーの循環参照を断ち、抽出直後に解放
+        if ctx.bounded_memory and soup is not None:
+            soup.decompose()
+
+# Function to extract an archived page (runs in a re-extraction worker process)
+def extract_archived_page(html_text, detail_url):
+    # ワーカープロセスからはStreamlitへ出力しないため、既定の設定で抽出する
+    return extract_job_details(ScrapeContext(), html_text, detail_url)
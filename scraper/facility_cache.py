@@ -0,0 +1,110 @@
+# 施設単位の会社情報のキャッシュ（同じ施設の2件目以降の求人では代表者・電話番号の抽出を省く）
+#
+# 代表者・代表電話番号は求人ではなく施設（会社）の情報のため、最初の求人で抽出した値を保持し、
+# 同じ施設の求人ではページ全体の文字列を走査するような抽出処理を行わずにその値を使う。
+# 施設は埋め込みデータの施設IDがあればそれで、なければ施設に固有の箇所から取得した施設名で識別する
+# （見出し・タイトルなどから推定した施設名は別の施設と重なりうるため、その求人ではキャッシュを使わない）。
+# 勤務地は同じ施設でも求人ごとに異なるため、キャッシュしない。
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# キャッシュする項目と、見つからなかった場合の値（見つからなかった項目は保持しない）
+FACILITY_FIELDS = {
+    "representative": "",
+    "phone_number": "情報なし",
+}
+# 保持時間の既定値（分）
+DEFAULT_FACILITY_TTL_MINUTES = 60
+# 保持する施設数の上限（超えた場合は最も古く使われた施設から破棄する）
+MAX_FACILITIES = 10000
+
+# Function to get the cache key of a facility (None if the facility is unknown; pass a name only when it came
+# from a facility-specific source, as names guessed from headings or titles can be shared by other facilities)
+def get_facility_key(facility_name, facility_id=None):
+    if facility_id:
+        return f"id:{facility_id}"
+    if not facility_name or facility_name == "情報なし":
+        return None
+    return "name:" + re.sub(r'\s+', '', unicodedata.normalize("NFKC", facility_name)).lower()
+
+# Cache of the company fields per facility, shared across runs and sessions
+class FacilityCache:
+    def __init__(self, max_facilities=MAX_FACILITIES):
+        self.max_facilities = max_facilities
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # キー → (保存時刻, {項目: 値})
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.reused_fields = 0  # 抽出を省いた項目の数
+    
+    # Function to get the requested fields of a facility cached within ttl seconds ({} if none)
+    def get(self, key, ttl, fields=tuple(FACILITY_FIELDS)):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            cached = {field: entry[1][field] for field in fields if field in entry[1]} if entry is not None else {}
+            if not cached:
+                self.misses += 1
+                return {}
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.reused_fields += len(cached)
+            return cached
+    
+    # Function to store the fields found for a facility (merged into the cached ones)
+    def put(self, key, fields):
+        fields = {field: value for field, value in fields.items() if value and value != FACILITY_FIELDS.get(field)}
+        if not fields:
+            return
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            # 保存時刻は最初に保存した時刻のまま（保持時間が過ぎれば抽出し直す）
+            stored_at, cached = entry if entry is not None else (time.monotonic(), {})
+            self._entries[key] = (stored_at, {**cached, **fields})
+            while len(self._entries) > self.max_facilities:
+                self._entries.popitem(last=False)
+    
+    # Function to get the totals for display
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "facilities": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "reused_fields": self.reused_fields,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+    
+    # Function to drop all cached facilities and reset the totals
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.expired = self.reused_fields = 0
+    
+    def __len__(self):
+        return len(self._entries)
+
+# Function to look up the company fields a record is missing from the facility cache ({} if the cache is not used)
+def lookup_facility_fields(ctx, facility_key, record, url):
+    missing = [field for field in FACILITY_FIELDS if not record.get(field)]
+    if ctx.facility_cache is None or not ctx.facility_cache_ttl or facility_key is None or not missing:
+        return {}
+    cached = ctx.facility_cache.get(facility_key, ctx.facility_cache_ttl, missing)
+    if cached:
+        ctx.log("info", f"施設情報のキャッシュを使用: {', '.join(cached)}", url=url)
+    return cached
+
+# Function to remember the company fields extracted for a facility
+def remember_facility_fields(ctx, facility_key, representative, phone_number):
+    if ctx.facility_cache is None or not ctx.facility_cache_ttl or facility_key is None:
+        return
+    ctx.facility_cache.put(facility_key, {"representative": representative, "phone_number": phone_number})
@@ -0,0 +1,209 @@
+# HTTPリクエスト（URLの検証・再試行・時間制限）
+import random
+import time
+import urllib.parse
+
+from scraper.proxies import mask_proxy_url
+from scraper.retry import classify_error, is_proxy_fault, parse_retry_after
+
+# 時間制限モードで1回のリクエストに最低限必要な残り時間（秒）
+MIN_REQUEST_SECONDS = 2
+# 時間制限モードでのエラー（呼び出し側で未取得・再試行待ちとして扱う）
+DEADLINE_EXCEEDED = "制限時間に達したため取得しませんでした"
+RETRY_DEFERRED = "取得に失敗したため、未取得の求人の後に再試行します"
+
+# Common headers to mimic a browser
+def get_headers():
+    return {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',
+        'Referer': 'https://toranet.jp/',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Cache-Control': 'max-age=0',
+    }
+
+# Function to validate URL - ensure we only process relevant URLs
+def is_valid_job_url(ctx, url):
+    if not url:
+        return False
+    
+    # Skip favorite_jobs and other irrelevant paths
+    invalid_paths = ['favorite_jobs', 'login', 'register', 'contact', 'about']
+    for path in invalid_paths:
+        if path in url:
+            return False
+    
+    # Only allow toranet.jp URLs or URLs that contain job-related terms (sitemaps included)
+    valid = (
+        ('toranet.jp' in url and ('job' in url or 'kyujin' in url or 'prefectures' in url or 'sitemap' in url)) or
+        ('job_detail' in url)
+    )
+    
+    if not valid:
+        ctx.log("info", "無効なURLをスキップしました", url=url)
+        
+    return valid
+
+# Function to get the seconds left until the deadline (None without a time limit)
+def get_remaining_time(ctx):
+    if ctx.deadline is None:
+        return None
+    return ctx.deadline - time.monotonic()
+
+# Function to check whether there is no time left for another request
+def is_deadline_reached(ctx):
+    remaining = get_remaining_time(ctx)
+    return remaining is not None and remaining < MIN_REQUEST_SECONDS
+
+# Function to wait between requests, shortening the wait as the deadline approaches
+def wait_politely(ctx, seconds):
+    remaining = get_remaining_time(ctx)
+    if remaining is not None:
+        seconds = min(seconds, max(remaining - MIN_REQUEST_SECONDS, 0) * 0.05)
+    time.sleep(seconds)
+
+# Function to wait politely before the next request (with a proxy pool, the pool spaces requests per proxy instead)
+def wait_between_requests(ctx, seconds):
+    if ctx.proxy_pool is not None and len(ctx.proxy_pool):
+        return
+    wait_politely(ctx, seconds)
+
+# 再試行時に表示するメッセージ（エラーの種類ごと）
+RETRY_MESSAGES = {
+    "timeout": "リクエストがタイムアウトしました。再試行中...",
+    "connection": "リクエストエラーが発生しました。再試行中...",
+    "unavailable": "サーバーが一時的に利用できません。再試行中...",
+    "rate_limited": "リクエストが多すぎるため制限されています。再試行中...",
+    "server_error": "サーバーエラーが発生しました。再試行中...",
+}
+
+# Function to describe a failed request as an error message
+def describe_request_error(exception):
+    import requests
+    
+    if isinstance(exception, requests.exceptions.HTTPError):
+        return f"HTTPエラー: {exception.response.status_code} - {exception}"
+    if isinstance(exception, requests.exceptions.Timeout):
+        return "リクエストがタイムアウトしました。サーバーが混雑している可能性があります。"
+    return f"リクエストエラー: {str(exception)}"
+
+# Function to make requests with retry logic
+def make_request(ctx, url, max_retries=5, timeout=30, defer_retries=False, stream=False):
+    import requests  # 起動を軽くするため、実際にリクエストするときに読み込む
+    
+    # Validate URL before sending request
+    if not is_valid_job_url(ctx, url):
+        return None, f"無効なURL: {url}"
+    
+    host = urllib.parse.urlsplit(url).hostname
+    for attempt in range(max_retries):
+        # 時間制限モードでは残り時間に合わせてタイムアウトを短縮し、時間がなければ打ち切る
+        remaining = get_remaining_time(ctx)
+        if remaining is not None and remaining < MIN_REQUEST_SECONDS:
+            return None, DEADLINE_EXCEEDED
+        request_timeout = timeout if remaining is None else min(timeout, remaining / 2)
+        
+        # 連続して失敗しているホストには、一定時間リクエストを送らない
+        allowed, wait_seconds = ctx.circuit_breakers.allow_request(host)
+        if not allowed:
+            return None, f"{host} への接続を一時停止しています（連続して失敗したため。{wait_seconds:.0f} 秒後に再開します）"
+        
+        # 成功・失敗を記録せずに抜けた場合（プロキシがない、想定外の例外など）は、半開状態の試行の枠を解放する
+        recorded = False
+        proxy = None
+        try:
+            # 初回リクエストの場合は短い待機時間（再試行の待機は失敗時に決める）
+            if attempt == 0:
+                wait_between_requests(ctx, random.uniform(0.5, 1.5))
+            
+            # プロキシのプールがあれば、送信できる健全なプロキシを選び、その送信間隔を守って送る
+            if ctx.proxy_pool is not None and len(ctx.proxy_pool):
+                proxy = ctx.proxy_pool.acquire()
+                if proxy is None:
+                    return None, "利用できるプロキシがありません（すべてのプロキシが連続した失敗により除外されています）"
+            
+            ctx.log("info", "リクエスト送信中" + (f"（プロキシ {mask_proxy_url(proxy.url)}）" if proxy else ""), url=url)
+            response = requests.get(
+                url, headers=get_headers(), timeout=request_timeout, stream=stream,
+                proxies={"http": proxy.url, "https": proxy.url} if proxy else None
+            )
+            ctx.log("success", f"ステータスコード: {response.status_code}", url=url)
+            response.raise_for_status()
+            ctx.circuit_breakers.record_success(host)
+            recorded = True
+            if proxy:
+                ctx.proxy_pool.record_success(proxy)
+            # ストリーミングで読むレスポンス（サイトマップ・詳細ページ）は本体をここで読み込まないため、呼び出し側に任せる
+            # （本体の読み込み中の失敗を送信したプロキシの失敗として数えられるよう、プロキシを添えておく）
+            if stream:
+                response.proxy = proxy
+            elif ctx.archive_pages and ctx.archive is not None:
+                ctx.archive.append(url, response.content, response.status_code, response.encoding)
+            return response, None
+        except requests.exceptions.RequestException as e:
+            error_class = classify_error(e)
+            # 再試行しないエラー（404など）はホストが応答しているため失敗として数えない
+            # プロキシは接続エラー・タイムアウト・407・429の場合のみ失敗として数える（ホストの5xxはサーキットブレーカーのみ）
+            if proxy:
+                if is_proxy_fault(e):
+                    ctx.proxy_pool.record_failure(proxy)
+                else:
+                    ctx.proxy_pool.record_success(proxy)
+            if error_class is None:
+                ctx.circuit_breakers.record_success(host)
+                recorded = True
+                return None, describe_request_error(e)
+            # プロキシ自体への接続エラーはホストの失敗として数えず、そのプロキシの失敗としてのみ数える
+            if not isinstance(e, requests.exceptions.ProxyError):
+                ctx.circuit_breakers.record_failure(host)
+                recorded = True
+            
+            # 再試行を後回しにする場合は、その場で再試行せずに呼び出し側へ返す
+            if defer_retries:
+                return None, RETRY_DEFERRED
+            if attempt >= max_retries - 1 or not ctx.retry_policy.allow_retry(error_class, attempt):
+                return None, describe_request_error(e)
+            
+            # Retry-Afterが指定されていればそれに従い、なければ指数バックオフ（フルジッター）
+            delay = ctx.retry_policy.get_delay(attempt, parse_retry_after(getattr(e, "response", None)))
+            if delay is None:
+                return None, f"{describe_request_error(e)}（Retry-Afterの待機時間が長すぎるため再試行しません）"
+            ctx.log("warning", f"{RETRY_MESSAGES[error_class]} ({attempt+1}/{max_retries}) {delay:.1f} 秒待機します", url=url)
+            wait_politely(ctx, delay)
+        finally:
+            if not recorded:
+                ctx.circuit_breakers.release_probe(host)
+    
+    return None, "最大再試行回数に達しました。後でもう一度お試しください。"
+
+# Function to read the body of a streamed response, counting an error while reading (connection reset, read
+# timeout, broken chunked encoding) as a failed request (returns (result of read, error) like make_request)
+def read_streamed_body(ctx, url, response, read, defer_retries=False):
+    import requests
+    
+    try:
+        return read(response), None
+    except requests.exceptions.RequestException as e:
+        proxy = getattr(response, "proxy", None)
+        if proxy and is_proxy_fault(e):
+            ctx.proxy_pool.record_failure(proxy)
+        ctx.circuit_breakers.record_failure(urllib.parse.urlsplit(url).hostname)
+        ctx.log("warning", f"本体の読み込み中にエラーが発生しました: {describe_request_error(e)}", url=url)
+        # 再試行を後回しにする場合は、未取得の求人の後に取得し直す
+        if defer_retries:
+            return None, RETRY_DEFERRED
+        return None, describe_request_error(e)
+
+# Function to run a fetch once for all concurrent runs requesting the same URL (returns (result, error) like the fetch)
+def fetch_shared(ctx, kind, url, fetch):
+    result, shared = ctx.single_flight.do(kind, url, fetch, timeout=get_remaining_time(ctx))
+    if result is None:
+        return None, DEADLINE_EXCEEDED
+    if shared:
+        ctx.log("info", "他の実行が取得中のページのため、その結果を共有しました", url=url)
+        # 取得した側の都合による結果（再試行の後回し・時間切れ）は共有せず、自分で取得し直す
+        if result[1] in (RETRY_DEFERRED, DEADLINE_EXCEEDED):
+            return fetch()
+    return result
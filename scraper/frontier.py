@@ -0,0 +1,82 @@
+# 取得する求人リンクの優先順位付け（キーワードとの関連度の高い求人から取得する）
+#
+# 検索結果ページで見つけた求人リンクを、リンクの文字列・一覧カードの内容・URLとキーワードの一致度で
+# 点数付けし、ヒープに入れておく。取得件数の上限に対して多めに候補を集め、点数の高い順に取り出す。
+import heapq
+import itertools
+import unicodedata
+import urllib.parse
+
+# キーワードの語が含まれる箇所ごとの点数（カードの職種名・施設名 > リンクの文字列 > カード全体 > URL）
+SCORE_WEIGHTS = {
+    "job_title": 4.0,
+    "facility_name": 3.0,
+    "anchor": 2.0,
+    "text": 1.0,
+    "url": 0.5,
+}
+# キーワードのすべての語に一致した場合の加点
+ALL_TERMS_BONUS = 3.0
+# 求人詳細のURLパターンに一致するリンクの加点（求人らしいだけの予備の候補より優先）
+DETAIL_LINK_BONUS = 1.0
+# 関連度順に取得する場合に、取得件数の何倍まで候補を集めるか
+FRONTIER_OVERSAMPLE = 3
+
+# Function to normalize text for keyword matching (full-width to half-width, case-insensitive)
+def normalize_for_match(text):
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+# Function to split a search keyword into normalized terms
+def get_keyword_terms(keyword):
+    return normalize_for_match(keyword).split()
+
+# Function to score a link against the keyword terms (higher is more relevant)
+def score_link(terms, url, anchor_text="", card=None, is_detail=True):
+    card = card or {}
+    fields = {
+        "job_title": normalize_for_match(card.get("job_title")),
+        "facility_name": normalize_for_match(card.get("facility_name")),
+        "anchor": normalize_for_match(anchor_text),
+        "text": normalize_for_match(card.get("text")),
+        "url": normalize_for_match(urllib.parse.unquote(url)),
+    }
+    score = DETAIL_LINK_BONUS if is_detail else 0.0
+    matched_terms = 0
+    for term in terms:
+        matched = False
+        for name, weight in SCORE_WEIGHTS.items():
+            if term in fields[name]:
+                score += weight
+                matched = True
+        matched_terms += matched
+    if terms and matched_terms == len(terms):
+        score += ALL_TERMS_BONUS
+    return score
+
+# Priority queue of candidate job links, best-scoring first (ties keep the page order)
+class LinkFrontier:
+    def __init__(self, keyword):
+        self.terms = get_keyword_terms(keyword)
+        self._heap = []  # (-点数, 見つけた順, URL)
+        self._seen = set()
+        self._order = itertools.count()
+    
+    # Function to add a candidate link (returns False if it was already added)
+    def push(self, url, anchor_text="", card=None, is_detail=True):
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        score = score_link(self.terms, url, anchor_text, card, is_detail)
+        heapq.heappush(self._heap, (-score, next(self._order), url))
+        return True
+    
+    # Function to take out the n best-scoring links as (url, score) pairs
+    def pop_best(self, n):
+        best = []
+        while self._heap and len(best) < n:
+            negative_score, _, url = heapq.heappop(self._heap)
+            best.append((url, -negative_score))
+        return best
+    
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,166 @@
+# バックグラウンドのクロール実行（画面のセッションから切り離して実行し、画面は状態を表示するだけ）
+#
+# クロールはジョブとしてプロセス全体で共有する実行器に登録され、ジョブIDで状態・進捗・結果を参照する。
+# 画面の再実行・タブを閉じても実行は続き、同じ条件で実行中のジョブがあれば新しく実行せずに合流する。
+import dataclasses
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper.debug_log import DebugLog
+from scraper.retry import RetryPolicy
+from scraper.store import JobStore
+
+# 同じクロールとみなす設定（キーワードに加えて、これらが一致するジョブには合流する）
+JOB_KEY_FIELDS = [
+    "direct_listing", "bounded_memory", "memory_budget_mb", "max_jobs", "dedupe_mode",
+    "skip_duplicate_details", "listing_only_mode", "required_card_fields", "time_budget",
+    "discovery", "sitemap_filter", "prioritize_links", "stream_details",
+    "facility_cache_ttl", "debug_mode",
+]
+# ジョブの状態
+JOB_STATUS_LABELS = {
+    "queued": "待機中",
+    "running": "実行中",
+    "done": "完了",
+    "cancelled": "中止",
+    "failed": "失敗",
+}
+ACTIVE_STATUSES = ("queued", "running")
+
+# Function to convert a setting value to a hashable form (lists and dicts included)
+def make_hashable(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, make_hashable(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(make_hashable(item) for item in value)
+    return value
+
+# Function to build the key identifying identical crawls
+def get_job_key(keyword, ctx):
+    return (keyword.strip(),) + tuple(make_hashable(getattr(ctx, name)) for name in JOB_KEY_FIELDS)
+
+# A crawl submitted to the background service (status, progress and results)
+class CrawlJob:
+    def __init__(self, keyword, ctx, key, enable_profiling=False):
+        self.id = uuid.uuid4().hex[:8]
+        self.keyword = keyword
+        self.key = key
+        # 実行ごとの状態はジョブ専用にし、実行ログもジョブごとに分ける
+        self.ctx = dataclasses.replace(
+            ctx,
+            show_html=False,  # HTML表示は画面と同じスレッドでのみ可能
+            debug_log=DebugLog(path=ctx.debug_log.path),
+            job_cards={},
+            layout_stats={},
+            spill_file=None,
+            retry_policy=RetryPolicy(),
+            deadline=None,
+            stream_stats={},
+            memory_check={},
+        )
+        self.enable_profiling = enable_profiling
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.joined = 0  # 合流した実行要求の数
+        self.cancel_requested = False
+        
+        # 進捗（画面は定期的にこれを読み出して表示する）
+        self.done = 0
+        self.total = 0
+        self.status_text = "実行を待っています..."
+        
+        # 結果（job_list への追加と表示用の読み出しは lock で排他する）
+        self.lock = threading.Lock()
+        self.job_list = JobStore()
+        self.duplicates = None
+        self.search_url = None
+        self.error = None
+        self.notes = []  # 実行後に表示するメッセージ（level, message）
+        self.skipped_links = []  # 制限時間により取得しなかった求人
+        self.profiler = None
+    
+    # Function to check whether the job is still queued or running
+    def is_active(self):
+        return self.status in ACTIVE_STATUSES
+    
+    # Function to update the progress shown to the viewers
+    def set_progress(self, done, total, status_text):
+        self.done, self.total, self.status_text = done, total, status_text
+    
+    # Function to add a message shown with the results
+    def note(self, level, message):
+        self.notes.append((level, message))
+    
+    # Function to ask the job to stop (results fetched so far are kept)
+    def cancel(self):
+        self.cancel_requested = True
+    
+    # Function to summarize the job as a table row
+    def row(self):
+        return {
+            "ID": self.id,
+            "キーワード": self.keyword,
+            "状態": JOB_STATUS_LABELS[self.status],
+            "進捗": f"{self.done}/{self.total}" if self.total else "-",
+            "取得": len(self.job_list),
+            "登録": time.strftime("%H:%M:%S", time.localtime(self.submitted_at)),
+        }
+
+# Long-lived executor running crawl jobs outside the Streamlit sessions
+class CrawlService:
+    def __init__(self, max_workers=2, keep_finished=20):
+        self.keep_finished = keep_finished
+        self._lock = threading.Lock()
+        self._jobs = {}  # ジョブID → CrawlJob（登録順）
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crawl")
+    
+    # Function to submit a crawl (joins an identical queued or running job; returns the job and whether it was joined)
+    def submit(self, keyword, ctx, run, enable_profiling=False):
+        key = get_job_key(keyword, ctx)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.is_active():
+                    job.joined += 1
+                    return job, True
+            job = CrawlJob(keyword, ctx, key, enable_profiling)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, run)
+        return job, False
+    
+    def _run(self, job, run):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            run(job.ctx, job.keyword, job)
+            status = "failed" if job.error else "cancelled" if job.cancel_requested else "done"
+        except Exception as e:
+            job.error = f"クロール中にエラーが発生しました: {e}"
+            job.ctx.log("error", job.error, traceback=traceback.format_exc())
+            status = "failed"
+        job.ctx.debug_log.flush()
+        job.finished_at = time.time()
+        # 結果がそろってから状態を更新する（画面は状態を見て結果の表示に切り替える）
+        job.status = status
+    
+    # Function to drop the oldest finished jobs beyond the retention limit
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.is_active()]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            job = self._jobs.pop(job_id)
+            if job.ctx.spill_file is not None:
+                job.ctx.spill_file.close()
+    
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+    
+    # Function to list the jobs, newest first
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())[::-1]
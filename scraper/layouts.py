@@ -0,0 +1,83 @@
+# ページレイアウトのフィンガープリントとレイアウトごとの抽出プラン
+import hashlib
+import re
+
+from scraper.text import format_phone_digits
+
+# CSS Modulesのハッシュ付きクラス名（例: styles_content__HWIR6）
+CSS_MODULE_CLASS_PATTERN = re.compile(r'\bstyles_[A-Za-z0-9]+__[A-Za-z0-9_-]{5}\b')
+
+# Function to extract fields from the recruit detail layout (h3 + p.styles_content pairs)
+def extract_recruit_layout(soup):
+    fields = {}
+    
+    # 見出し(h3)と内容(p)の組を一度の走査で取得
+    for element in soup.select('p.styles_content__HWIR6'):
+        prev_el = element.find_previous()
+        if not prev_el or prev_el.name != 'h3':
+            continue
+        heading = prev_el.text
+        content = element.text.strip()
+        
+        if '代表者' in heading and 'representative' not in fields:
+            if content and content != "者" and len(content) > 1 and content != "名" and "名】" not in content and not re.search(r'[】］）】\])]$', content):
+                fields['representative'] = content
+        elif '勤務地' in heading and 'location' not in fields:
+            if len(content) > 5:
+                fields['location'] = content
+        elif ('電話番号' in heading or 'TEL' in heading.upper()) and 'phone_number' not in fields:
+            digits = re.sub(r'[^\d]', '', content)
+            if digits:
+                fields['phone_number'] = format_phone_digits(digits)
+    
+    # 募集要項テーブル（th + td.styles_recruitCol）から仕事内容を取得
+    for td in soup.select('td.styles_recruitCol__rbAHs'):
+        th = td.find_previous_sibling('th')
+        if th and '仕事内容' in th.text:
+            content = td.text.strip()
+            if content:
+                fields['job_description'] = content
+                break
+    
+    return fields
+
+# 既知のレイアウトと抽出プラン（必須クラス名がすべて含まれるページに適用）
+LAYOUT_PLANS = [
+    {
+        "name": "recruit_detail",
+        "required_classes": {"styles_content__HWIR6", "styles_recruitCol__rbAHs"},
+        "extract": extract_recruit_layout,
+    },
+]
+
+# フィンガープリント → 抽出プラン（未知のレイアウトはNone）
+layout_plan_cache = {}
+
+# Function to fingerprint a page layout by its CSS module class names
+def get_layout_fingerprint(html_text):
+    classes = set(CSS_MODULE_CLASS_PATTERN.findall(html_text))
+    if not classes:
+        return None, classes
+    fingerprint = hashlib.md5(" ".join(sorted(classes)).encode("utf-8")).hexdigest()[:12]
+    return fingerprint, classes
+
+# Function to find the extraction plan for a page layout
+def match_layout_plan(ctx, html_text, url):
+    fingerprint, classes = get_layout_fingerprint(html_text)
+    if fingerprint is None:
+        return None
+    
+    if fingerprint not in layout_plan_cache:
+        layout_plan_cache[fingerprint] = next(
+            (plan for plan in LAYOUT_PLANS if plan["required_classes"] <= classes), None
+        )
+    plan = layout_plan_cache[fingerprint]
+    
+    entry = ctx.layout_stats.setdefault(fingerprint, {
+        "plan": plan["name"] if plan else None,
+        "pages": 0,
+        "example_url": url,
+        "class_count": len(classes),
+    })
+    entry["pages"] += 1
+    return plan
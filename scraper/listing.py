@@ -0,0 +1,387 @@
+# 検索結果ページからの求人リンク取得と一覧カードの読み取り
+import math
+import random
+import re
+import urllib.parse
+
+from scraper.data_routes import (
+    fetch_listing_data, forget_build_id, get_build_id, get_current_build_id, is_build_id_verified,
+    remember_build_id, verify_build_id
+)
+from scraper.fetch import fetch_shared, get_remaining_time, is_valid_job_url, make_request, wait_between_requests
+from scraper.frontier import FRONTIER_OVERSAMPLE, LinkFrontier
+from scraper.text import clean_facility_name
+from scraper.ui import display_html_response
+
+# 時間制限モードで一覧ページの取得に使う時間の割合（残りは詳細ページに充てる）
+LISTING_TIME_SHARE = 0.3
+
+# 都道府県名（カードから勤務地を読み取る際に使用）
+PREFECTURE_PATTERN = re.compile(
+    r'(?:北海道|青森県|岩手県|宮城県|秋田県|山形県|福島県|茨城県|栃木県|群馬県|埼玉県|千葉県|東京都|神奈川県|'
+    r'新潟県|富山県|石川県|福井県|山梨県|長野県|岐阜県|静岡県|愛知県|三重県|滋賀県|京都府|大阪府|兵庫県|'
+    r'奈良県|和歌山県|鳥取県|島根県|岡山県|広島県|山口県|徳島県|香川県|愛媛県|高知県|福岡県|佐賀県|長崎県|'
+    r'熊本県|大分県|宮崎県|鹿児島県|沖縄県)[^\n]{2,80}'
+)
+
+# Function to read a listing card (text and fields shown in the search results)
+def parse_job_card(a_tag):
+    card = a_tag.find_parent(['article', 'li', 'section']) or a_tag.parent
+    if card is None:
+        return {"text": ""}
+    lines = card.get_text("\n", strip=True)
+    result = {"text": lines.replace("\n", " ")[:1000]}
+    
+    # 施設名: 会社名・施設名らしいクラスを持つ要素
+    for class_pattern in [r'corp|company|facility|office', r'name']:
+        name_element = card.find(class_=re.compile(class_pattern, re.IGNORECASE))
+        if name_element and name_element.get_text(strip=True):
+            result["facility_name"] = clean_facility_name(name_element.get_text(strip=True))
+            break
+    
+    # 職種・求人タイトル: カード内の見出し
+    title_element = card.find(['h2', 'h3', 'h4'])
+    if title_element and title_element.get_text(strip=True):
+        result["job_title"] = title_element.get_text(strip=True)
+    
+    # 勤務地: 「勤務地」ラベルの後、または都道府県名から始まるテキスト
+    location_match = re.search(r'勤務地[：:\s]*([^\n]{5,100})', lines) or PREFECTURE_PATTERN.search(lines)
+    if location_match:
+        result["location"] = (location_match.group(1) if location_match.re.groups else location_match.group(0)).strip()
+    
+    return result
+
+# リンクの種類を判定するURLパターン（上から順に照合し、最初に一致した種類とする）
+# 求人詳細は求人IDを取り出し、クエリ文字列・計測用パラメータが異なるだけのリンクを同じ求人として扱う
+LINK_PATTERNS = [
+    ("detail", re.compile(r'^https?://(?:www\.)?toranet\.jp/prefectures/[a-z_-]+/job_detail/(\d+)/?(?:[?#]|$)')),
+    ("detail", re.compile(r'^https?://(?:www\.)?toranet\.jp/(?:[^?#]*/)?job_detail/(\d+)/?(?:[?#]|$)')),
+    ("pagination", re.compile(r'^https?://(?:www\.)?toranet\.jp/[^?#]*/page/\d+/?(?:[?#]|$)')),
+]
+# 求人詳細が見つからない場合に候補とするリンク（サイト構造の変更に備えた予備）
+FALLBACK_LINK_PATTERN = re.compile(r'job.*detail|kyujin|recruit')
+FALLBACK_LINK_TEXTS = ('詳細', '求人')
+
+# Function to convert a link to an absolute toranet.jp URL
+def get_absolute_url(href):
+    if href.startswith('http'):
+        return href
+    if href.startswith('/'):
+        return f"https://toranet.jp{href}"
+    return f"https://toranet.jp/{href}"
+
+# Function to classify a link as detail, pagination or other (returns the kind and the job ID for details)
+def classify_link(url):
+    for kind, pattern in LINK_PATTERNS:
+        match = pattern.match(url)
+        if match:
+            return kind, match.group(1) if match.re.groups else None
+    return "other", None
+
+# Function to get the canonical URL of a link (query string, fragment and trailing slash removed)
+def get_canonical_url(url):
+    return re.split(r'[?#]', url, maxsplit=1)[0].rstrip('/')
+
+# Function to find all potential job detail links (with a frontier, links are also scored and queued by relevance)
+def find_all_job_links(ctx, soup, search_url, frontier=None):
+    # 関連度順に取得する場合は、取得件数より多めに候補を集める
+    limit = ctx.max_jobs * FRONTIER_OVERSAMPLE if frontier is not None else ctx.max_jobs
+    detail_links = {}  # 求人ID → 正規化したURL（ページ内の出現順）
+    fallback_links = {}  # 正規化したURL → リンク要素（求人詳細が見つからない場合のみ使用）
+    kind_counts = {"detail": 0, "pagination": 0, "other": 0}
+    
+    # ページ内のリンクを順に分類し、上限件数の求人IDがそろった時点で打ち切る
+    for a_tag in soup.find_all('a', href=True):
+        href = a_tag.get('href')
+        
+        # Skip empty links
+        if not href:
+            continue
+        
+        url = get_absolute_url(href)
+        kind, job_id = classify_link(url)
+        kind_counts[kind] += 1
+        if kind == "detail":
+            if job_id in detail_links:
+                continue
+            detail_links[job_id] = get_canonical_url(url)
+            card = parse_job_card(a_tag) if (ctx.dedupe_mode or ctx.listing_only_mode or frontier is not None) else None
+            if ctx.dedupe_mode or ctx.listing_only_mode:
+                ctx.job_cards.setdefault(detail_links[job_id], card)
+            if frontier is not None:
+                frontier.push(detail_links[job_id], a_tag.get_text().strip(), card)
+            if len(detail_links) >= limit:
+                break
+        elif kind == "other" and not detail_links:
+            text = a_tag.get_text().strip()
+            if FALLBACK_LINK_PATTERN.search(url) or any(word in text for word in FALLBACK_LINK_TEXTS):
+                fallback_links.setdefault(get_canonical_url(url), a_tag)
+    
+    if ctx.debug_mode:
+        ctx.log(
+            "info",
+            f"ページ内のリンクの種類: 求人詳細 {kind_counts['detail']} 件（求人ID {len(detail_links)} 件）、"
+            f"ページ送り {kind_counts['pagination']} 件、その他 {kind_counts['other']} 件",
+            url=search_url
+        )
+    
+    if detail_links:
+        result_urls = list(detail_links.values())
+    else:
+        # 求人詳細のURLパターンに一致するリンクがない場合は、求人らしいリンクを候補にする
+        result_urls = [
+            url for url in fallback_links
+            if url != get_canonical_url(search_url) and is_valid_job_url(ctx, url)
+        ][:limit]
+        if result_urls:
+            ctx.log("warning", "求人詳細のURLパターンに一致するリンクがないため、求人らしいリンクを使用します", url=search_url)
+        for url in result_urls:
+            card = parse_job_card(fallback_links[url]) if (ctx.dedupe_mode or ctx.listing_only_mode or frontier is not None) else None
+            if ctx.dedupe_mode or ctx.listing_only_mode:
+                ctx.job_cards.setdefault(url, card)
+            if frontier is not None:
+                frontier.push(url, fallback_links[url].get_text().strip(), card, is_detail=False)
+    
+    if ctx.debug_mode:
+        # Show potential job links in debug mode
+        for i, url in enumerate(result_urls[:20]):  # Show first 20 only
+            ctx.log("info", f"求人リンク {i+1}", url=url)
+    
+    ctx.log("info", f"取得した求人リンク数: {len(result_urls)}", url=search_url)
+    
+    return result_urls
+
+# Function to get the job links of a result page from its JSON data route (links, total count and page size; None links if unusable)
+def find_data_route_links(ctx, build_id, search_url, frontier=None):
+    items, total, error = fetch_listing_data(ctx, build_id, search_url)
+    if error:
+        ctx.log("info", f"データルートから取得できませんでした: {error}", url=search_url)
+        return None, None, None
+    
+    limit = ctx.max_jobs * FRONTIER_OVERSAMPLE if frontier is not None else ctx.max_jobs
+    # 確認前のbuildIdの結果は同じページのHTMLとの照合にのみ使い、カード・候補には加えない
+    verified = is_build_id_verified(build_id)
+    prefecture_match = re.search(r'/prefectures/([a-z_-]+)/', search_url)
+    detail_links = {}  # 求人ID → 正規化したURL
+    for item in items:
+        # 求人のURLがあればそこから、なければ求人IDと検索中の都道府県から詳細ページのURLを作る
+        kind, job_id = classify_link(get_absolute_url(item["href"])) if item["href"] else ("other", None)
+        if kind == "detail":
+            url = get_canonical_url(get_absolute_url(item["href"]))
+        elif item["job_id"] and prefecture_match:
+            job_id = item["job_id"]
+            url = f"https://toranet.jp/prefectures/{prefecture_match.group(1)}/job_detail/{job_id}"
+        else:
+            continue
+        if job_id in detail_links:
+            continue
+        detail_links[job_id] = url
+        if verified and (ctx.dedupe_mode or ctx.listing_only_mode):
+            ctx.job_cards.setdefault(url, item["card"])
+        if verified and frontier is not None:
+            frontier.push(url, item["card"].get("job_title", ""), item["card"])
+        if len(detail_links) >= limit:
+            break
+    
+    ctx.log("info", f"データルートから取得した求人リンク数: {len(detail_links)}", url=search_url)
+    return list(detail_links.values()), total, len(items)
+
+# Function to scrape job listings
+def get_job_listings(ctx, keyword):
+    from bs4 import BeautifulSoup
+    
+    # Create search URL
+    encoded_keyword = urllib.parse.quote(keyword)
+    base_search_url = f"https://toranet.jp/prefectures/tokyo/job_search/kw/{encoded_keyword}"
+    
+    # If direct_listing is checked, use the search URL directly
+    if ctx.direct_listing:
+        ctx.log("info", "一覧ページを直接詳細ページとして使用します", url=base_search_url)
+        return [base_search_url], None, base_search_url
+    
+    # ページネーション対応のために変数を準備
+    all_job_links = []
+    current_page = 1
+    max_pages = 10 if ctx.max_jobs <= 300 else ctx.max_jobs // 20  # 最大ページ数（安全のため）
+    
+    # 関連度順に取得する場合は、取得件数より多めに候補を集めてから点数の高い順に選ぶ
+    frontier = LinkFrontier(keyword) if ctx.prioritize_links else None
+    target_links = ctx.max_jobs * FRONTIER_OVERSAMPLE if frontier is not None else ctx.max_jobs
+    
+    # 以前の実行で分かったbuildIdがあれば、1ページ目からJSONのデータルートで取得する
+    build_id = get_current_build_id()
+    total = None  # データルートから分かった検索結果の総件数
+    listed_count = 0  # これまでのページで見つけた求人リンクの数
+    
+    while len(all_job_links) < target_links and current_page <= max_pages:
+        # 時間制限モードでは、一覧ページに割り当てた時間を使い切ったら次のページに進まない
+        remaining = get_remaining_time(ctx)
+        if current_page > 1 and remaining is not None and remaining < ctx.time_budget * (1 - LISTING_TIME_SHARE):
+            ctx.log("info", f"制限時間のため、ページ {current_page} 以降の一覧ページは取得しません。")
+            break
+        
+        # ページURLを構築（1ページ目は通常のURL、2ページ目以降はページ番号を追加）
+        if current_page == 1:
+            search_url = base_search_url
+        else:
+            search_url = f"{base_search_url}/page/{current_page}"
+        
+        ctx.log("info", f"ページ {current_page} の求人を取得中", url=search_url)
+        
+        # データルートが使えれば、HTMLを取得・解析せずにJSONから求人リンクを読む
+        page_job_links = None
+        failed_build_id = None
+        unverified_links = None
+        if build_id is not None:
+            page_job_links, page_total, page_size = find_data_route_links(ctx, build_id, search_url, frontier)
+            if page_job_links is not None and page_total is not None and page_size:
+                # 総件数から必要なページ数が分かれば、それ以上のページは取得しない
+                total = page_total
+                planned_pages = max(1, math.ceil(total / page_size))
+                if planned_pages < max_pages:
+                    max_pages = planned_pages
+                    ctx.log("info", f"検索結果は全 {total} 件（{planned_pages} ページ）です")
+            if page_job_links is None or (not page_job_links and (total is None or listed_count < total)):
+                # 取得できなかったページ、総件数に達していないのに求人がないページはHTMLで取得し直す
+                failed_build_id = build_id
+                build_id = None
+                page_job_links = None
+            elif page_job_links and not is_build_id_verified(build_id):
+                # 初めて使うbuildIdは、同じページのHTMLと求人が一致することを確かめてから信用する
+                unverified_links = page_job_links
+                page_job_links = None
+        
+        if page_job_links is None:
+            # 他の実行が同じページを取得中であれば、そのレスポンスを共有する
+            response, error = fetch_shared(ctx, "listing", search_url, lambda: make_request(ctx, search_url))
+            if error:
+                if current_page > 1:
+                    # 2ページ目以降でエラーが出た場合は、ページネーションの終了とみなす
+                    ctx.log("warning", f"ページ {current_page} の取得に失敗しました。これ以上のページはないと判断します。")
+                    break
+                else:
+                    # 1ページ目からエラーの場合は本当のエラーとして処理
+                    return None, error, search_url
+            
+            # Display HTML for debugging
+            display_html_response(ctx, response, f"検索結果ページ {current_page}")
+            
+            try:
+                soup = BeautifulSoup(response.text, 'html.parser')
+                
+                # Advanced link finding approach - get multiple links
+                page_job_links = find_all_job_links(ctx, soup, search_url, frontier)
+                
+                # HTMLでは求人が見つかった場合、データルートは使えないものとして以後使わない
+                if failed_build_id is not None and page_job_links:
+                    forget_build_id(failed_build_id)
+                    ctx.log("warning", "データルートから取得できないため、HTMLの検索結果ページで取得します", url=search_url)
+                # データルートの求人がHTMLと一致しなければ、そのbuildIdは以後使わない
+                if unverified_links is not None and not verify_build_id(build_id, unverified_links, page_job_links):
+                    ctx.log("warning", "データルートの求人が検索結果ページと一致しないため、HTMLで取得します", url=search_url)
+                # 次のページからはページに埋め込まれたbuildIdのデータルートを使う
+                build_id = remember_build_id(get_build_id(response.text))
+                
+                # 省メモリクロールでは検索結果ページのツリーを即座に破棄（リンクがない場合は後続の判定で使用）
+                if ctx.bounded_memory and page_job_links:
+                    soup.decompose()
+                    response.close()
+                
+                if not page_job_links and current_page == 1:
+                    # 1ページ目でリンクがない場合は、検索ページ自体が求人詳細かチェック
+                    if any(tag.name in ['h1', 'h2'] and ('求人情報' in tag.text or '仕事内容' in tag.text) for tag in soup.find_all(['h1', 'h2'])):
+                        ctx.log("success", "検索ページ自体が求人詳細ページのようです。直接使用します。")
+                        return [search_url], None, search_url
+                    
+                    return None, "求人リンクが見つかりませんでした。サイト構造が変更された可能性があります。", search_url
+                    
+            except Exception as e:
+                import traceback
+                ctx.log("error", f"解析エラー: {str(e)}", url=search_url, traceback=traceback.format_exc())
+                if current_page == 1:
+                    return None, f"パース中にエラーが発生しました: {str(e)}", search_url
+                else:
+                    # 2ページ目以降のエラーは、ここまでのリンクを使って続行
+                    break
+        
+        if not page_job_links:
+            # 2ページ目以降でリンクがない場合は、ページネーションの終了とみなす
+            ctx.log("info", f"ページ {current_page} には求人リンクがありません。これ以上のページはないと判断します。")
+            break
+        
+        listed_count += len(page_job_links)
+        
+        # 新しく見つけたリンクを追加（重複を避けるためにセットを使用）
+        existing_links = set(all_job_links)
+        for link in page_job_links:
+            if link not in existing_links and len(all_job_links) < target_links:
+                all_job_links.append(link)
+                existing_links.add(link)
+        
+        ctx.log("success", f"ページ {current_page} から {len(page_job_links)} 件のリンクを取得しました。現在の合計: {len(all_job_links)} 件")
+        
+        # 次のページに進む
+        current_page += 1
+        
+        # 既に十分な数のリンクが得られた場合は終了
+        if len(all_job_links) >= target_links:
+            ctx.log("info", f"設定された上限 {target_links} 件に達したため、ページネーションを終了します。")
+            break
+            
+        # ページ間の待機時間を設定して、サーバー負荷を軽減
+        if current_page <= max_pages:
+            wait_between_requests(ctx, random.uniform(1.0, 3.0))
+    
+    ctx.log("success", f"合計 {len(all_job_links)} 件の求人リンクを取得しました（{current_page-1} ページ探索）")
+    
+    # 集めた候補から、キーワードとの関連度の高い順に取得件数分を選ぶ
+    if frontier is not None:
+        best_links = frontier.pop_best(ctx.max_jobs)
+        all_job_links = [url for url, _ in best_links]
+        ctx.log("info", f"候補 {len(best_links) + len(frontier)} 件から関連度の高い {len(all_job_links)} 件を選びました")
+        if ctx.debug_mode:
+            for i, (url, score) in enumerate(best_links[:20]):
+                ctx.log("info", f"関連度 {i+1}位: {score:.1f} 点", url=url)
+    
+    # 1ページ目から最大ページ数まで探索して見つかったリンクを返す
+    return all_job_links, None, base_search_url
+
+
+# 補完対象の項目名と求人レコードのキーの対応
+CARD_FIELD_KEYS = {
+    "施設名": "facility_name",
+    "勤務地": "location",
+    "業務内容": "job_description",
+    "代表者": "representative",
+    "電話番号": "phone_number",
+}
+
+# Function to check whether a record field has no value
+def is_missing_value(value):
+    return not value or value == "情報なし"
+
+# Function to build a partial job record from the listing card
+def build_card_record(ctx, link):
+    card = ctx.job_cards.get(link) or {}
+    job_title = card.get("job_title") or "情報なし"
+    return {
+        "facility_name": card.get("facility_name") or "情報なし",
+        "representative": "",
+        "location": card.get("location", ""),
+        "phone_number": "情報なし",
+        "job_description": job_title,
+        "short_description": job_title[:100] + "..." if len(job_title) > 100 else job_title,
+        "source_url": link,
+    }
+
+# Function to list the required fields missing from a card record
+def get_missing_card_fields(ctx, card_record):
+    return [label for label in ctx.required_card_fields if is_missing_value(card_record[CARD_FIELD_KEYS[label]])]
+
+# Function to fill fields missing from the detail page with the card values
+def merge_job_records(card_record, detail_record):
+    merged = dict(detail_record)
+    for field, value in card_record.items():
+        if is_missing_value(merged.get(field)) and not is_missing_value(value):
+            merged[field] = value
+    return merged
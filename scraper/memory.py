@@ -0,0 +1,83 @@
+# 省メモリクロール（メモリ使用量の計測・長いテキストのディスク退避）
+import gc
+import os
+import sys
+import tempfile
+import time
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 省メモリクロール時に job_description をメモリ上に保持する最大文字数
+DESCRIPTION_INLINE_LIMIT = 500
+# 省メモリクロールでメモリ使用量を計測する間隔（求人の件数・秒数のどちらかに達したら計測する）
+MEMORY_CHECK_EVERY_JOBS = 20
+MEMORY_CHECK_INTERVAL = 2.0
+
+# Function to get the current memory usage (RSS) in MB
+def get_memory_usage_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        # /procがない環境ではピーク値で代用
+        return get_peak_memory_mb()
+
+# Function to get the peak memory usage (max RSS) of the process in MB
+def get_peak_memory_mb():
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOSはバイト単位、Linuxはキロバイト単位
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+# Function to move a long text to the run's spill file
+def spill_text(ctx, text):
+    # 退避先の一時ファイルは実行ごとに作成し、閉じると自動削除される
+    if ctx.spill_file is None:
+        ctx.spill_file = tempfile.TemporaryFile()
+    data = text.encode("utf-8")
+    ctx.spill_file.seek(0, os.SEEK_END)
+    offset = ctx.spill_file.tell()
+    ctx.spill_file.write(data)
+    return offset, len(data)
+
+# Function to load the full job description (including spilled text)
+def load_job_description(ctx, job):
+    ref = job.get("job_description_ref")
+    if not ref or ctx.spill_file is None:
+        return job["job_description"]
+    offset, length = ref
+    ctx.spill_file.seek(offset)
+    return ctx.spill_file.read(length).decode("utf-8")
+
+# Function to cap long text fields of a job record
+def compact_job_record(ctx, job, inline_limit=DESCRIPTION_INLINE_LIMIT):
+    description = job["job_description"]
+    if len(description) > inline_limit + 3:
+        # 全文は一度だけ退避し、以降は切り詰めのみ行う
+        if not job.get("job_description_ref"):
+            job["job_description_ref"] = spill_text(ctx, description)
+        job["job_description"] = description[:inline_limit] + "..."
+    return job
+
+# Function to keep memory usage within the budget (measured only every few jobs or seconds; returns the last usage)
+def enforce_memory_budget(ctx, job_list, budget_mb):
+    state = ctx.memory_check
+    state["jobs"] = state.get("jobs", 0) + 1
+    now = time.monotonic()
+    if "usage" in state and state["jobs"] < MEMORY_CHECK_EVERY_JOBS and now - state["at"] < MEMORY_CHECK_INTERVAL:
+        return state["usage"]
+    state["jobs"] = 0
+    state["at"] = now
+    usage = get_memory_usage_mb()
+    if usage > budget_mb:
+        # 上限超過時は循環参照を回収し、前回の超過以降に追加された業務内容のみ表示用の長さまで退避
+        gc.collect()
+        for index in range(state.get("compacted", 0), len(job_list)):
+            job_list[index] = compact_job_record(ctx, job_list[index], inline_limit=100)
+        state["compacted"] = len(job_list)
+        usage = get_memory_usage_mb()
+    state["usage"] = usage
+    return usage
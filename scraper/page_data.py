@@ -0,0 +1,110 @@
+# ページに埋め込まれたデータ（Next.jsの __NEXT_DATA__）からの求人情報の取得
+#
+# 詳細ページには画面の描画に使う求人データがJSONとして埋め込まれているため、HTMLのツリーを
+# 作らずにJSONを読み込み、キー名から求人レコードの項目を取り出す。キー名はサイト側の実装に
+# 依存するため候補を複数持ち、見つからない項目は呼び出し側でHTMLから抽出する。
+import html
+import json
+import re
+from collections import deque
+
+from scraper.text import clean_facility_name, format_phone_digits
+
+# 埋め込みデータのscript要素
+NEXT_DATA_PATTERN = re.compile(r'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.DOTALL)
+# 求人レコードの項目と、埋め込みデータ内のキーの候補（小文字・区切り文字なしで比較、先にあるものを優先）
+PAGE_DATA_KEYS = {
+    "facility_name": ["corpname", "companyname", "facilityname", "officename", "clientname", "shopname"],
+    "representative": ["representative", "representativename", "ceoname", "presidentname"],
+    "location": ["worklocation", "workplace", "workplaceaddress", "workaddress", "location", "address"],
+    "phone_number": ["representativephonenumber", "phonenumber", "tel", "telephone", "telno"],
+    "job_description": ["jobdescription", "workcontent", "jobcontent", "recruitcontent", "occupationcontent", "description"],
+    "facility_id": ["corpid", "companyid", "facilityid", "officeid"],  # 施設情報のキャッシュのキー
+}
+KEY_FIELDS = {key: (field, rank) for field, keys in PAGE_DATA_KEYS.items() for rank, key in enumerate(keys)}
+# 求人レコードの項目ではない項目（施設情報のキャッシュのキーにのみ使い、抽出結果・抽出方法の集計には含めない）
+NON_RECORD_FIELDS = {"facility_id"}
+# SEO用の説明文・会社の所在地などにも使われる汎用のキー（これで見つけた項目はHTMLからも抽出する）
+GENERIC_PAGE_DATA_KEYS = {"description", "address", "location"}
+# この項目が求人に固有のキーでそろえばHTMLからの抽出を行わない（代表者・電話番号は掲載されない求人がある）
+REQUIRED_PAGE_DATA_FIELDS = ("facility_name", "location", "job_description")
+# 他の求人のデータを含むキー（おすすめ・閲覧履歴など）とSEO用のデータは探索しない
+SKIPPED_KEY_PATTERN = re.compile(r'recommend|related|similar|ranking|history|popular|seo|meta|breadcrumb', re.IGNORECASE)
+# 探索する階層の深さの上限
+MAX_PAGE_DATA_DEPTH = 12
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Function to load the whole embedded JSON blob (None if the page has none)
+def load_next_data(html_text):
+    match = NEXT_DATA_PATTERN.search(html_text)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(1))
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+# Function to load the page data embedded as JSON (None if the page has none)
+def load_page_data(html_text):
+    data = load_next_data(html_text)
+    page_props = (data.get("props") or {}).get("pageProps") if data else None
+    return page_props if isinstance(page_props, (dict, list)) and page_props else None
+
+# Function to convert a page data value to plain text (HTML fragments and nested address parts included)
+def get_page_data_text(value):
+    if isinstance(value, dict):
+        value = "".join(item for item in value.values() if isinstance(item, str))
+    elif isinstance(value, list):
+        value = "\n".join(item for item in value if isinstance(item, str))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        return ""
+    text = html.unescape(TAG_PATTERN.sub("\n", value))
+    return re.sub(r'\n\s*\n+', '\n', text).strip()
+
+# Function to find the job record fields in the page data (earlier key candidates, then shallower keys win;
+# returns the fields and the set of fields found only under generic keys)
+def find_page_data_fields(data):
+    found = {}  # 項目 → (キーの優先順, 階層の深さ, 値, キー)
+    queue = deque([(data, 0)])
+    while queue:
+        value, depth = queue.popleft()
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        for key, item in items:
+            if isinstance(key, str):
+                if SKIPPED_KEY_PATTERN.search(key):
+                    continue
+                normalized_key = re.sub(r'[_\-]', '', key).lower()
+                field, rank = KEY_FIELDS.get(normalized_key, (None, None))
+                if field and (rank, depth) < found.get(field, (len(KEY_FIELDS), 0))[:2]:
+                    text = get_page_data_text(item)
+                    if text:
+                        found[field] = (rank, depth, text, normalized_key)
+                        continue
+            if isinstance(item, (dict, list)) and depth < MAX_PAGE_DATA_DEPTH:
+                queue.append((item, depth + 1))
+    fields = {field: text for field, (_, _, text, _) in found.items()}
+    generic_fields = {field for field, (_, _, _, key) in found.items() if key in GENERIC_PAGE_DATA_KEYS}
+    return fields, generic_fields
+
+# Function to extract the job record fields from the embedded page data (({}, set()) if there is no usable data)
+def extract_page_data_fields(html_text):
+    data = load_page_data(html_text)
+    if not data:
+        return {}, set()
+    fields, generic_fields = find_page_data_fields(data)
+    
+    # HTMLから抽出した場合と同じ形式にそろえる
+    if "facility_name" in fields:
+        fields["facility_name"] = clean_facility_name(fields["facility_name"])
+    if "phone_number" in fields:
+        digits = re.sub(r'[^\d]', '', fields.pop("phone_number"))
+        if digits:
+            fields["phone_number"] = format_phone_digits(digits)
+    return fields, generic_fields
+
+# Function to check whether the page data alone is enough for a job record (required fields under job-specific keys)
+def has_required_page_data(fields, generic_fields):
+    return all(fields.get(field) and field not in generic_fields for field in REQUIRED_PAGE_DATA_FIELDS)
@@ -0,0 +1,315 @@
+# スクレイピング実行の流れ（進捗・結果の表示を含む）
+import gc
+import os
+import time
+
+import streamlit as st
+
+from scraper.archive import detail_entries, reextract
+from scraper.dedup import DuplicateTracker
+from scraper.detail import extract_archived_page, get_job_details
+from scraper.fetch import DEADLINE_EXCEEDED, RETRY_DEFERRED, is_deadline_reached
+from scraper.listing import build_card_record, get_job_listings, get_missing_card_fields, merge_job_records
+from scraper.memory import (
+    compact_job_record, enforce_memory_budget, get_memory_usage_mb, get_peak_memory_mb, load_job_description
+)
+from scraper.profiling import display_profile, finish_profiling, start_profiling
+from scraper.sitemap import get_sitemap_links
+from scraper.store import JobStore
+from scraper.table import iter_unique_jobs
+from scraper.ui import (
+    display_full_job_details, display_job_table, display_layout_report, display_retry_summary, save_selector_stats
+)
+
+# Function to add the scraped jobs to the full-text search index (returns an error message on failure)
+def index_jobs(ctx, job_list):
+    if ctx.search_index is None:
+        return None
+    return ctx.search_index.add_jobs(
+        {**job, "job_description": load_job_description(ctx, job)} for job in job_list
+    )
+
+# Function to scrape a single detail page entered directly (debug)
+def run_direct_url(ctx, direct_url, enable_profiling=False):
+    ctx.debug_log.clear()
+    st.info(f"直接入力されたURLを使用: {direct_url}")
+    profiler = start_profiling(enable_profiling)
+    with st.spinner('URLから情報を取得中...'):
+        job_details, error = get_job_details(ctx, direct_url)
+        
+        if error:
+            st.error(error)
+        elif job_details:
+            # Display job details
+            display_full_job_details(ctx, job_details)
+    display_retry_summary(ctx)
+    display_layout_report(ctx)
+    save_selector_stats(ctx)
+    finish_profiling(profiler)
+
+# Function to search by keyword and scrape the detail pages of the results (runs in the background service)
+def crawl_keyword(ctx, search_keyword, job):
+    # バックグラウンドのスレッドで実行するため画面には直接表示せず、進捗・結果はジョブに記録する
+    profiler = start_profiling(job.enable_profiling)
+    try:
+        scrape_keyword(ctx, search_keyword, job)
+    finally:
+        # 実行が失敗した場合もプロファイラーを止める（有効なままだと以降の処理まで計測され続ける）
+        if profiler is not None:
+            profiler.disable()
+            job.profiler = profiler
+
+# Function to run the search and the detail page scraping of a background crawl
+def scrape_keyword(ctx, search_keyword, job):
+    # 時間制限モードでは、一覧ページの取得を含めた全体を制限時間内に収める
+    started_at = time.monotonic()
+    if ctx.time_budget:
+        ctx.deadline = started_at + ctx.time_budget
+    job.set_progress(0, 0, "検索中...")
+    # サイトマップ探索モードでは、検索結果ページを巡回せずに索引から取得対象を列挙する
+    if ctx.discovery == "sitemap":
+        job_links, error, search_url = get_sitemap_links(ctx)
+    else:
+        job_links, error, search_url = get_job_listings(ctx, search_keyword)
+    job.search_url = search_url
+    
+    if error:
+        job.error = error
+    elif job_links:
+        job_list = job.job_list
+        total_jobs = len(job_links)
+        job.note("info", f"合計 {total_jobs} 件の求人リンクが見つかりました。")
+        
+        # エラーカウンター
+        error_count = 0
+        error_limit = min(total_jobs // 2, 50)  # 最大エラー数（全体の半分か50のいずれか小さい方）
+        
+        # 類似求人のグループ化
+        duplicates = DuplicateTracker(ctx.job_cards) if ctx.dedupe_mode else None
+        job.duplicates = duplicates
+        
+        # 一覧のカードのみで取得できた件数
+        card_only_count = 0
+        
+        # 実行中のメモリ使用量のピーク（省メモリクロール時に計測）
+        run_peak_mb = get_memory_usage_mb() if ctx.bounded_memory else 0.0
+        
+        # 時間制限モードでは、失敗した求人の再試行を未取得の求人の後に回す（末尾に追加）
+        work_links = list(job_links)
+        stop_index = None
+        
+        for idx, link in enumerate(work_links):
+            # 制限時間に達した場合・中止された場合は残りを取得せず、取得済みの結果を返す
+            if is_deadline_reached(ctx) or job.cancel_requested:
+                stop_index = idx
+                break
+            
+            is_retry = idx >= total_jobs
+            current_job_num = idx + 1
+            if is_retry:
+                job.set_progress(total_jobs, total_jobs, f"取得に失敗した求人を再試行中... ({idx + 1 - total_jobs}/{len(work_links) - total_jobs})")
+            else:
+                job.set_progress(idx, total_jobs, f"求人情報を取得中... ({current_job_num}/{total_jobs})")
+            
+            ctx.log("info", "求人詳細ページにアクセスしています", url=link)
+            
+            card_record = build_card_record(ctx, link) if ctx.listing_only_mode else None
+            
+            # カードが取得済みの求人とほぼ同じであれば詳細ページの取得を省略
+            if ctx.skip_duplicate_details and duplicates.match_card(link) is not None:
+                ctx.log("info", "類似求人のため詳細ページの取得をスキップしました", url=link)
+                job_details, error = None, None
+            # カードの内容だけで必要な項目がそろう場合も詳細ページを取得しない
+            elif card_record is not None and not get_missing_card_fields(ctx, card_record):
+                job_details, error = card_record, None
+                card_only_count += 1
+            else:
+                job_details, error = get_job_details(ctx, link, defer_retries=ctx.deadline is not None and not is_retry)
+                if card_record is not None and job_details:
+                    job_details = merge_job_records(card_record, job_details)
+            
+            if error == RETRY_DEFERRED:
+                work_links.append(link)
+            elif error == DEADLINE_EXCEEDED:
+                stop_index = idx
+                break
+            elif error:
+                error_count += 1
+                ctx.log("error", f"詳細ページの取得に失敗: {error}", url=link)
+                
+                # エラーが多すぎる場合は処理を中断
+                if error_count >= error_limit:
+                    job.note("warning", f"エラーが多すぎるため、処理を中断しました。取得済み: {len(job_list)}/{total_jobs}")
+                    break
+            elif job_details:
+                if ctx.dedupe_mode:
+                    job_details["duplicate_group"] = duplicates.assign(job_details)
+                if ctx.bounded_memory:
+                    job_details = compact_job_record(ctx, job_details)
+                with job.lock:
+                    job_list.append(job_details)
+            
+            if ctx.bounded_memory:
+                with job.lock:
+                    run_peak_mb = max(run_peak_mb, enforce_memory_budget(ctx, job_list, ctx.memory_budget_mb))
+            
+            # メモリ使用量の最適化
+            if ctx.enable_gc and current_job_num % 20 == 0:
+                gc.collect()
+        
+        job.set_progress(total_jobs, total_jobs, "完了")
+        
+        # 実行結果のまとめ
+        if ctx.bounded_memory:
+            job.note("info", f"メモリ使用量のピーク: 実行中 {run_peak_mb:.0f} MB / 上限 {ctx.memory_budget_mb} MB（プロセス全体 {get_peak_memory_mb():.0f} MB）")
+            if run_peak_mb > ctx.memory_budget_mb:
+                job.note("warning", "メモリ上限を超過しました。取得件数を減らすか上限を引き上げてください。")
+        
+        if job.cancel_requested and stop_index is not None:
+            job.note("warning", f"中止したため {len(work_links[stop_index:total_jobs])} 件の求人を取得しませんでした")
+        elif ctx.deadline is not None:
+            # 制限時間により取得しなかった求人（未取得）と省略した再試行を報告
+            unfetched = work_links[stop_index:total_jobs] if stop_index is not None else []
+            retries_skipped = work_links[max(stop_index, total_jobs):] if stop_index is not None else []
+            job.note("info", f"制限時間 {ctx.time_budget} 秒のうち {time.monotonic() - started_at:.0f} 秒で取得を終了しました")
+            if unfetched or retries_skipped:
+                job.note("warning", f"制限時間のため {len(unfetched)} 件の求人を取得せず、{len(retries_skipped)} 件の再試行を省略しました")
+                job.skipped_links = [f"未取得: {link}" for link in unfetched] + [f"再試行省略: {link}" for link in retries_skipped]
+        
+        if ctx.listing_only_mode:
+            job.note("info", f"一覧のカードから {card_only_count} 件を取得しました（詳細ページの取得: {total_jobs - card_only_count} 件）")
+        
+        if ctx.stream_details and ctx.stream_stats.get("pages"):
+            stats = ctx.stream_stats
+            job.note("info", f"詳細ページ {stats['pages']} 件のうち {stats.get('cut', 0)} 件を途中で打ち切りました（読み込み量 {stats['bytes'] / 1024 / 1024:.1f} MB）")
+        
+        if ctx.dedupe_mode:
+            job.note("info", f"類似求人を {len(duplicates.groups)} グループにまとめました（詳細取得をスキップ: {duplicates.skipped} 件）")
+        
+        if job_list:
+            error = index_jobs(ctx, job_list)
+            if error:
+                job.note("warning", error)
+    
+    error = ctx.selector_stats.save()
+    if error:
+        job.note("warning", error)
+
+# Function to display the status, progress and results of a background crawl
+def display_crawl_job(job):
+    ctx = job.ctx
+    
+    # Display search URL for debugging
+    if ctx.debug_mode and job.search_url:
+        st.markdown(f"検索URL: [{job.search_url}]({job.search_url})")
+    if job.joined:
+        st.caption(f"同じ条件の実行要求 {job.joined} 件をこのクロールにまとめました（ID: {job.id}）")
+    
+    if job.is_active():
+        # 実行中は進捗と途中結果のみ表示（画面を閉じても実行は続く）
+        st.info(f"「{job.keyword}」をバックグラウンドで取得しています（ID: {job.id}）。画面を閉じても取得は続きます。")
+        st.progress(min(job.done / job.total, 1.0) if job.total else 0.0, text=job.status_text)
+        with job.lock:
+            if len(job.job_list):
+                st.success(f"現在 {len(job.job_list)}/{job.total} 件の求人情報を取得しました")
+                display_job_table(job.job_list, job.duplicates.groups if job.duplicates else None)
+        if st.button("中止", key=f"cancel_{job.id}"):
+            job.cancel()
+        return
+    
+    if job.error:
+        st.error(job.error)
+        if ctx.debug_mode and job.search_url:
+            st.error("セレクタが変更された可能性があります。手動で確認してみてください。")
+            st.markdown(f"[検索結果を直接確認する]({job.search_url})")
+    
+    for level, message in job.notes:
+        getattr(st, level)(message)
+    if job.skipped_links:
+        with st.expander("制限時間により省略した求人"):
+            st.write("\n".join(job.skipped_links))
+    
+    job_list = job.job_list
+    duplicate_groups = job.duplicates.groups if job.duplicates else None
+    if job_list:
+        st.success(f"{len(job_list)}件の求人情報を取得しました！")
+        
+        # Display jobs in a table
+        df = display_job_table(job_list, duplicate_groups)
+        st.download_button(
+            "CSVをダウンロード",
+            data=df.to_csv(index=False).encode("utf-8-sig"),
+            file_name=f"toranet_{time.strftime('%Y%m%d_%H%M%S', time.localtime(job.finished_at))}.csv",
+            mime="text/csv"
+        )
+        
+        # メモリ使用量を考慮して詳細情報の表示を制御
+        if len(job_list) > 50 and ctx.optimize_memory:
+            show_details = st.checkbox("詳細情報を表示する（大量のデータがあるため、表示には時間がかかる場合があります）")
+            if show_details:
+                st.subheader("📋 詳細情報")
+                for job_details in iter_unique_jobs(job_list):
+                    display_full_job_details(ctx, job_details)
+        else:
+            # Show full details in expandable sections
+            st.subheader("📋 詳細情報")
+            for job_details in iter_unique_jobs(job_list):
+                display_full_job_details(ctx, job_details)
+    elif not job.error:
+        st.warning("求人情報を取得できませんでした。")
+    display_retry_summary(ctx)
+    display_layout_report(ctx)
+    display_profile(job.profiler)
+
+# Function to refresh the sitemap index of job URLs
+def run_sitemap_refresh(ctx):
+    ctx.debug_log.clear()
+    status_text = st.empty()
+    with st.spinner("サイトマップを読み込み中..."):
+        stats = ctx.sitemap_index.refresh(ctx, progress=status_text.text)
+    status_text.empty()
+    st.success(
+        f"サイトマップ {stats['sitemaps']} 件から求人URL {stats['urls']} 件を索引に反映しました"
+        f"（更新のないサイトマップ {stats['skipped']} 件を省略、求人以外のURL {stats['ignored']} 件）"
+    )
+    if stats["errors"]:
+        with st.expander(f"読み込めなかったサイトマップ（{len(stats['errors'])} 件）"):
+            st.write("\n".join(stats["errors"]))
+
+# Function to re-extract the archived detail pages with the current extractor
+def run_reextract(ctx, enable_profiling=False):
+    # アーカイブ済みの詳細ページに現在の抽出処理を並列で適用（ネットワークアクセスなし）
+    profiler = start_profiling(enable_profiling)
+    entries = detail_entries(ctx.archive)
+    st.info(f"アーカイブ済みの {len(entries)} ページから再抽出しています...")
+    progress_bar = st.progress(0)
+    started_at = time.time()
+    
+    job_list = JobStore()
+    errors = []
+    for done, (url, job_details, error) in enumerate(
+        reextract(ctx.archive.directory, entries, extract_archived_page), start=1
+    ):
+        if error:
+            errors.append(f"{url}: {error}")
+        elif job_details:
+            job_list.append(job_details)
+        progress_bar.progress(done / len(entries))
+    progress_bar.empty()
+    
+    st.success(f"{len(job_list)}件の求人情報を再抽出しました（{time.time() - started_at:.1f} 秒、{os.cpu_count()} プロセス）")
+    if errors:
+        with st.expander(f"再抽出に失敗したページ（{len(errors)} 件）"):
+            st.write("\n".join(errors))
+    if job_list:
+        error = index_jobs(ctx, job_list)
+        if error:
+            st.warning(error)
+        df = display_job_table(job_list)
+        st.download_button(
+            "CSVをダウンロード",
+            data=df.to_csv(index=False).encode("utf-8-sig"),
+            file_name=f"toranet_reextract_{time.strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv"
+        )
+    finish_profiling(profiler)
@@ -0,0 +1,55 @@
+# スクレイピング実行のプロファイリング（cProfile）
+import cProfile
+import marshal
+import pstats
+import time
+
+import streamlit as st
+
+# Function to start profiling a scraping run
+def start_profiling(enabled):
+    if not enabled:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+# Function to stop profiling and display the results
+def finish_profiling(profiler, top_n=30):
+    if profiler is None:
+        return
+    profiler.disable()
+    display_profile(profiler, top_n)
+
+# Function to display the results of a stopped profiler
+def display_profile(profiler, top_n=30):
+    if profiler is None:
+        return
+    import pandas as pd
+    
+    stats = pstats.Stats(profiler)
+    
+    # 関数ごとの統計を表形式に変換
+    rows = []
+    for (filename, lineno, func_name), (primitive_calls, total_calls, total_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            "関数": func_name,
+            "場所": f"{filename.rsplit('/', 1)[-1]}:{lineno}",
+            "呼び出し回数": total_calls,
+            "自己時間(秒)": round(total_time, 4),
+            "累積時間(秒)": round(cumulative_time, 4),
+        })
+    
+    df = pd.DataFrame(rows).sort_values("累積時間(秒)", ascending=False).head(top_n)
+    
+    st.subheader("⏱ プロファイル結果")
+    st.caption(f"累積時間の多い上位 {len(df)} 関数（合計 {stats.total_tt:.2f} 秒）")
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    
+    # pstats形式の生データ（snakeviz・flameprof等で読み込み可能）
+    st.download_button(
+        "プロファイルをダウンロード (.prof)",
+        data=marshal.dumps(stats.stats),
+        file_name=f"scrape_{time.strftime('%Y%m%d_%H%M%S')}.prof",
+        mime="application/octet-stream"
+    )
@@ -0,0 +1,135 @@
+# 送信元プロキシのプール（プロキシごとの送信間隔・健全性の点数・失敗が続くプロキシの除外）
+#
+# 1つのIPから送る場合は送信間隔の上限が全体の取得速度の上限になるため、複数のプロキシに
+# リクエストを振り分け、送信間隔はプロキシごとに守る。プールが大きいほど全体の取得速度が上がる。
+import random
+import threading
+import time
+import urllib.parse
+
+# 同じプロキシから続けて送信するまでの間隔（秒、0.5〜1.5倍のゆらぎを加える）
+PROXY_MIN_INTERVAL = 1.0
+# 健全性の点数の更新率（直近の結果の重み。成功は1、失敗は0として指数移動平均をとる）
+HEALTH_ALPHA = 0.3
+# 健全性の点数がこれを下回るか、連続してこの回数失敗したプロキシは一定時間除外する
+EVICT_HEALTH = 0.3
+EVICT_FAILURES = 3
+EVICT_SECONDS = 300.0
+# 除外から戻したプロキシの健全性の点数（再び失敗すればすぐに除外される）
+RESTORED_HEALTH = 0.5
+
+# Function to parse the proxy list entered in the sidebar (one per line, http:// assumed without a scheme)
+def parse_proxy_list(text):
+    proxies = []
+    for line in (text or "").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if "://" not in line:
+            line = f"http://{line}"
+        if line not in proxies:
+            proxies.append(line)
+    return proxies
+
+# Function to mask the credentials of a proxy URL for display
+def mask_proxy_url(url):
+    parts = urllib.parse.urlsplit(url)
+    if parts.password is None:
+        return url
+    netloc = f"{parts.username}:***@{parts.hostname}" + (f":{parts.port}" if parts.port else "")
+    return urllib.parse.urlunsplit(parts._replace(netloc=netloc))
+
+# State of a single egress proxy
+class Proxy:
+    def __init__(self, url):
+        self.url = url
+        self.health = 1.0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.next_slot = 0.0  # 次に送信できる時刻（time.monotonic()の値）
+        self.evicted_until = None
+    
+    # Function to check whether the proxy is excluded (restores it once the eviction period has passed)
+    def is_evicted(self, now):
+        if self.evicted_until is not None and now >= self.evicted_until:
+            self.evicted_until = None
+            self.health = RESTORED_HEALTH
+            self.consecutive_failures = 0
+        return self.evicted_until is not None
+    
+    def record_success(self):
+        self.health += HEALTH_ALPHA * (1.0 - self.health)
+        self.consecutive_failures = 0
+    
+    def record_failure(self, now):
+        self.health -= HEALTH_ALPHA * self.health
+        self.consecutive_failures += 1
+        self.failures += 1
+        if self.health < EVICT_HEALTH or self.consecutive_failures >= EVICT_FAILURES:
+            self.evicted_until = now + EVICT_SECONDS
+
+# Pool of egress proxies shared across runs and sessions
+class ProxyPool:
+    def __init__(self, proxies, min_interval=PROXY_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._proxies = [Proxy(url) for url in proxies]
+    
+    # Function to reserve the healthy proxy that can send soonest and wait for its turn (None if all are evicted)
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            candidates = [proxy for proxy in self._proxies if not proxy.is_evicted(now)]
+            if not candidates:
+                return None
+            # 送信できる時刻が早い順、同じなら健全性の点数が高い順
+            proxy = min(candidates, key=lambda proxy: (max(proxy.next_slot, now), -proxy.health))
+            slot = max(proxy.next_slot, now)
+            proxy.next_slot = slot + self.min_interval * random.uniform(0.5, 1.5)
+            proxy.requests += 1
+        
+        # 予約した送信時刻まで待つ（待っている間も他のプロキシは使える）
+        time.sleep(max(0.0, slot - time.monotonic()))
+        return proxy
+    
+    def record_success(self, proxy):
+        with self._lock:
+            proxy.record_success()
+    
+    def record_failure(self, proxy):
+        with self._lock:
+            proxy.record_failure(time.monotonic())
+    
+    # Function to check whether any proxy is currently excluded
+    def has_evicted(self):
+        with self._lock:
+            now = time.monotonic()
+            return any(proxy.is_evicted(now) for proxy in self._proxies)
+    
+    # Function to list the proxy states as table rows
+    def rows(self):
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "プロキシ": mask_proxy_url(proxy.url),
+                    "状態": "除外中" if proxy.is_evicted(now) else "使用中",
+                    "健全性": round(proxy.health, 2),
+                    "リクエスト": proxy.requests,
+                    "失敗": proxy.failures,
+                    "再開まで(秒)": round(proxy.evicted_until - now) if proxy.evicted_until is not None else 0,
+                }
+                for proxy in self._proxies
+            ]
+    
+    # Function to bring all evicted proxies back into use
+    def reset(self):
+        with self._lock:
+            for proxy in self._proxies:
+                proxy.evicted_until = None
+                proxy.health = 1.0
+                proxy.consecutive_failures = 0
+    
+    def __len__(self):
+        return len(self._proxies)
@@ -0,0 +1,210 @@
+# 再試行ポリシー（指数バックオフ・Retry-After・エラー種類ごとの再試行回数）と
+# ホストごとのサーキットブレーカー
+import email.utils
+import random
+import threading
+import time
+
+# エラーの種類ごとの再試行回数（1リクエストあたり, 1回の実行全体）
+RETRY_BUDGETS = {
+    "timeout": (2, 30),
+    "connection": (3, 30),
+    "unavailable": (4, 50),  # 503
+    "rate_limited": (4, 50),  # 429
+    "server_error": (2, 20),  # 503以外の5xx
+}
+
+# エラーの種類ごとの表示名
+ERROR_CLASS_LABELS = {
+    "timeout": "タイムアウト",
+    "connection": "接続エラー",
+    "unavailable": "503 一時的に利用不可",
+    "rate_limited": "429 リクエスト過多",
+    "server_error": "5xx サーバーエラー",
+}
+
+# Function to classify a request exception into a retryable error class (None if not retryable)
+def classify_error(exception):
+    import requests
+    
+    if isinstance(exception, requests.exceptions.HTTPError):
+        status = exception.response.status_code
+        if status == 503:
+            return "unavailable"
+        if status == 429:
+            return "rate_limited"
+        if status >= 500:
+            return "server_error"
+        return None
+    if isinstance(exception, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(exception, requests.exceptions.ConnectionError):
+        return "connection"
+    return None
+
+# 送信元プロキシの失敗とみなすステータスコード（407: プロキシの認証エラー, 429: 送信元ごとの流量制限）
+PROXY_FAULT_STATUSES = {407, 429}
+
+# Function to check whether a request exception is a fault of the proxy it was sent through
+# (connection errors and timeouts, proxy authentication and rate limiting; not the host's 5xx or 4xx)
+def is_proxy_fault(exception):
+    import requests
+    
+    if isinstance(exception, requests.exceptions.HTTPError):
+        return exception.response is not None and exception.response.status_code in PROXY_FAULT_STATUSES
+    return isinstance(exception, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+# Function to read the Retry-After header (seconds or HTTP date) as seconds to wait
+def parse_retry_after(response):
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+# Retry policy of a scraping run (exponential backoff with full jitter)
+class RetryPolicy:
+    def __init__(self, base_delay=2.0, max_delay=60.0, max_retry_after=120.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # これより長いRetry-Afterが指定された場合は再試行しない
+        self.max_retry_after = max_retry_after
+        self._lock = threading.Lock()
+        self.used = {error_class: 0 for error_class in RETRY_BUDGETS}
+    
+    # Function to check the per-request and per-run budgets and consume one retry
+    def allow_retry(self, error_class, attempt):
+        per_request, per_run = RETRY_BUDGETS[error_class]
+        with self._lock:
+            if attempt >= per_request or self.used[error_class] >= per_run:
+                return False
+            self.used[error_class] += 1
+            return True
+    
+    # Function to get the wait before the next attempt (None if Retry-After is too long)
+    def get_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        # フルジッター: 0〜上限の一様乱数（上限は試行ごとに倍増）
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+    
+    # Function to list the retry usage as table rows
+    def rows(self):
+        with self._lock:
+            return [
+                {
+                    "エラーの種類": ERROR_CLASS_LABELS[error_class],
+                    "再試行": self.used[error_class],
+                    "上限（1回の実行）": RETRY_BUDGETS[error_class][1],
+                    "上限（1リクエスト）": RETRY_BUDGETS[error_class][0],
+                }
+                for error_class in RETRY_BUDGETS
+            ]
+
+# Circuit breaker of a single host
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+    
+    # Function to get the seconds until an open breaker lets a probe through
+    def seconds_until_probe(self):
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+    
+    # Function to check whether a request may be sent (half-opens after the reset timeout)
+    def allow_request(self):
+        if self.state == "open" and self.seconds_until_probe() == 0:
+            self.state = "half_open"
+            self.probe_in_flight = False
+        if self.state == "half_open":
+            # 半開状態では1件だけ試しに送信し、結果を見てから再開する
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+        return self.state == "closed"
+    
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+    
+    # Function to give back a probe slot that ended without a result (the next request becomes the probe)
+    def release_probe(self):
+        self.probe_in_flight = False
+    
+    def record_failure(self):
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+# Circuit breakers of all hosts, shared across runs and sessions
+class CircuitBreakerRegistry:
+    STATE_LABELS = {"closed": "正常", "open": "停止中", "half_open": "試行中"}
+    
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._breakers = {}
+    
+    def _get(self, host):
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self._breakers[host]
+    
+    # Function to check whether a request to the host may be sent (returns seconds to wait if not)
+    def allow_request(self, host):
+        with self._lock:
+            breaker = self._get(host)
+            if breaker.allow_request():
+                return True, 0.0
+            return False, breaker.seconds_until_probe()
+    
+    def record_success(self, host):
+        with self._lock:
+            self._get(host).record_success()
+    
+    def record_failure(self, host):
+        with self._lock:
+            self._get(host).record_failure()
+    
+    def release_probe(self, host):
+        with self._lock:
+            self._get(host).release_probe()
+    
+    # Function to check whether any host is currently not accepting requests
+    def has_open(self):
+        with self._lock:
+            return any(breaker.state != "closed" for breaker in self._breakers.values())
+    
+    # Function to list the breaker states as table rows
+    def rows(self):
+        with self._lock:
+            return [
+                {
+                    "ホスト": host,
+                    "状態": self.STATE_LABELS[breaker.state],
+                    "連続失敗": breaker.failures,
+                    "再開まで(秒)": round(breaker.seconds_until_probe()),
+                }
+                for host, breaker in self._breakers.items()
+            ]
+    
+    def clear(self):
+        with self._lock:
+            self._breakers.clear()
@@ -0,0 +1,155 @@
+# 取得済み求人の全文検索索引（SQLite FTS5、trigramトークナイザ）
+#
+# jobs テーブルに求人レコードをURL単位で保存し、jobs_fts（外部コンテンツのFTS5表）で
+# 施設名・所在地・業務内容を3文字単位（trigram）に分割して索引する。
+# 日本語は単語の区切りがないため、形態素解析の代わりにtrigramで部分一致検索を行う。
+import sqlite3
+import threading
+import time
+
+# 索引する列（検索結果の順位付けでの重み: 施設名 > 所在地 > 業務内容）
+INDEXED_COLUMNS = ["facility_name", "location", "job_description"]
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+# 索引はしないが検索結果に表示する列
+STORED_COLUMNS = ["representative", "phone_number"]
+# trigramで検索できる最短の文字数（これより短い語はLIKEで絞り込む）
+TRIGRAM_MIN_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    source_url TEXT UNIQUE NOT NULL,
+    facility_name TEXT,
+    location TEXT,
+    job_description TEXT,
+    representative TEXT,
+    phone_number TEXT,
+    indexed_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    facility_name, location, job_description,
+    content='jobs', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts(rowid, facility_name, location, job_description)
+    VALUES (new.id, new.facility_name, new.location, new.job_description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, facility_name, location, job_description)
+    VALUES ('delete', old.id, old.facility_name, old.location, old.job_description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, facility_name, location, job_description)
+    VALUES ('delete', old.id, old.facility_name, old.location, old.job_description);
+    INSERT INTO jobs_fts(rowid, facility_name, location, job_description)
+    VALUES (new.id, new.facility_name, new.location, new.job_description);
+END;
+"""
+
+# Function to quote a search term as an FTS5 phrase
+def quote_fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+# Function to escape a search term for LIKE
+def escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# Full-text search index of scraped job postings, kept across runs
+class JobSearchIndex:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.error = None  # FTS5・trigramに対応していないSQLiteの場合のエラーメッセージ
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            self._conn = None
+            self.error = f"検索索引を作成できませんでした（SQLite {sqlite3.sqlite_version}、FTS5のtrigramはSQLite 3.34以降が必要です）: {e}"
+    
+    # Function to add or update job records (keyed by source_url, returns an error message on failure)
+    def add_jobs(self, jobs):
+        if self._conn is None:
+            return self.error
+        now = time.time()
+        rows = [
+            (job["source_url"], *(job.get(column) or "" for column in INDEXED_COLUMNS + STORED_COLUMNS), now)
+            for job in jobs if job.get("source_url")
+        ]
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO jobs (source_url, facility_name, location, job_description, representative, phone_number, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(source_url) DO UPDATE SET "
+                    "facility_name = excluded.facility_name, location = excluded.location, "
+                    "job_description = excluded.job_description, representative = excluded.representative, "
+                    "phone_number = excluded.phone_number, indexed_at = excluded.indexed_at",
+                    rows
+                )
+        except sqlite3.Error as e:
+            return f"検索索引に登録できませんでした: {e}"
+        return None
+    
+    # Function to search the index (space-separated terms, all must match; best matches first)
+    def search(self, query, limit=50):
+        terms = query.split()
+        if self._conn is None or not terms:
+            return []
+        
+        # 3文字以上の語はtrigram索引で検索し、2文字以下の語（「渋谷」など）はLIKEで絞り込む
+        match_terms = [quote_fts_phrase(term) for term in terms if len(term) >= TRIGRAM_MIN_LENGTH]
+        like_conditions = []
+        params = []
+        for term in terms:
+            if len(term) < TRIGRAM_MIN_LENGTH:
+                like_conditions.append(
+                    "(" + " OR ".join(f"jobs.{column} LIKE ? ESCAPE '\\'" for column in INDEXED_COLUMNS) + ")"
+                )
+                params.extend([f"%{escape_like(term)}%"] * len(INDEXED_COLUMNS))
+        
+        columns = "jobs.source_url, jobs.facility_name, jobs.location, jobs.representative, jobs.phone_number, jobs.indexed_at"
+        if match_terms:
+            sql = (
+                f"SELECT {columns}, snippet(jobs_fts, 2, '【', '】', '…', 24) "
+                "FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid "
+                "WHERE jobs_fts MATCH ?"
+                + "".join(f" AND {condition}" for condition in like_conditions)
+                + f" ORDER BY bm25(jobs_fts, {', '.join(map(str, COLUMN_WEIGHTS))}) LIMIT ?"
+            )
+            params = [" AND ".join(match_terms)] + params + [limit]
+        else:
+            # 短い語のみの場合は新しく取得した順
+            sql = (
+                f"SELECT {columns}, substr(jobs.job_description, 1, 60) FROM jobs "
+                "WHERE " + " AND ".join(like_conditions) + " ORDER BY jobs.indexed_at DESC LIMIT ?"
+            )
+            params = params + [limit]
+        
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "source_url": row[0],
+                "facility_name": row[1],
+                "location": row[2],
+                "representative": row[3],
+                "phone_number": row[4],
+                "indexed_at": row[5],
+                "snippet": row[6],
+            }
+            for row in rows
+        ]
+    
+    def __len__(self):
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM jobs").fetchone()[0]
+    
+    # Function to remove all records from the index
+    def clear(self):
+        if self._conn is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs")
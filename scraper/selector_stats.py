@@ -0,0 +1,102 @@
+# 抽出戦略（セレクタ）ごとの成功率の記録と、それに基づく試行順の決定
+import json
+import threading
+
+# この回数以上試行して一度も成功していない戦略はスキップする
+SELECTOR_SKIP_MIN_ATTEMPTS = 30
+# スキップした戦略も、この回数スキップするごとに1回は試す（サイトの変更で使えるようになった場合に戻す）
+SELECTOR_RETRY_INTERVAL = 100
+# 要素は見つかったが値が検証を通らなかった回数がこの回数続いた戦略は、試行順を最後に回す
+SELECTOR_DEMOTE_REJECTS = 3
+
+# Function to check whether a strategy has never succeeded in enough attempts to be skipped
+def is_known_miss(entry):
+    return entry["hits"] == 0 and entry["attempts"] >= SELECTOR_SKIP_MIN_ATTEMPTS
+
+# Hit-rate statistics of extraction strategies, persisted across runs
+class SelectorStats:
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = {}
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._stats = json.load(f)
+            except (OSError, ValueError):
+                self._stats = {}
+    
+    # Function to save the statistics (returns an error message on failure)
+    def save(self):
+        if not self.path:
+            return None
+        try:
+            with self._lock:
+                data = json.dumps(self._stats, ensure_ascii=False, indent=1)
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(data)
+        except OSError as e:
+            return f"セレクタ統計を保存できませんでした: {e}"
+        return None
+    
+    # Function to record whether an extraction strategy succeeded (hit: the value passed the field's check,
+    # rejected: an element was found but its value failed the check)
+    def record(self, field, strategy, hit, rejected=False):
+        with self._lock:
+            entry = self._stats.setdefault(field, {}).setdefault(strategy, {"attempts": 0, "hits": 0})
+            entry["attempts"] += 1
+            if hit:
+                entry["hits"] += 1
+                entry["reject_streak"] = 0
+            elif rejected:
+                entry["reject_streak"] = entry.get("reject_streak", 0) + 1
+    
+    # Function to get the order to try strategies in (the given priority order, with strategies whose values
+    # keep failing the check moved last and known misses skipped except for a periodic retry)
+    def order(self, field, selectors):
+        with self._lock:
+            field_stats = self._stats.get(field, {})
+            candidates = []
+            demoted = []
+            for selector in selectors:
+                entry = field_stats.get(selector)
+                if entry is None:
+                    candidates.append(selector)
+                    continue
+                if is_known_miss(entry):
+                    entry["skipped"] = entry.get("skipped", 0) + 1
+                    if entry["skipped"] < SELECTOR_RETRY_INTERVAL:
+                        continue
+                    entry["skipped"] = 0
+                if entry.get("reject_streak", 0) >= SELECTOR_DEMOTE_REJECTS:
+                    demoted.append(selector)
+                else:
+                    candidates.append(selector)
+        return candidates + demoted
+    
+    # Function to list the statistics as table rows
+    def rows(self):
+        rows = []
+        with self._lock:
+            for field, strategies in self._stats.items():
+                for strategy, entry in strategies.items():
+                    attempts = entry["attempts"]
+                    hits = entry["hits"]
+                    rows.append({
+                        "項目": field,
+                        "戦略": strategy,
+                        "試行": attempts,
+                        "成功": hits,
+                        "成功率": f"{hits / attempts:.0%}" if attempts else "-",
+                        "状態": (
+                            "スキップ" if is_known_miss(entry)
+                            else "後回し" if entry.get("reject_streak", 0) >= SELECTOR_DEMOTE_REJECTS
+                            else ""
+                        ),
+                    })
+        return rows
+    
+    # Function to clear the statistics
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,70 @@
+# 同じURLへの同時リクエストの共有（プロセス全体で1回だけ取得し、結果を待っている全員に返す）
+import threading
+
+# 共有する処理の種類ごとの表示名
+FLIGHT_KIND_LABELS = {
+    "listing": "検索結果ページ",
+    "detail": "求人詳細ページ",
+}
+
+# An in-flight call that other callers can wait for
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+# Coalesces concurrent calls with the same key into a single execution
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # キー → 実行中の呼び出し
+        self.executed = {kind: 0 for kind in FLIGHT_KIND_LABELS}  # 実際に実行した回数
+        self.coalesced = {kind: 0 for kind in FLIGHT_KIND_LABELS}  # 実行中の呼び出しに合流した回数
+    
+    # Function to run fn once per key at a time (returns the result and whether it was shared; None, True on wait timeout)
+    def do(self, kind, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get((kind, key))
+            leader = call is None
+            if leader:
+                call = self._calls[(kind, key)] = _Call()
+                self.executed[kind] += 1
+            else:
+                self.coalesced[kind] += 1
+        
+        if not leader:
+            # 先に実行している呼び出しの完了を待ち、その結果を使う
+            if not call.done.wait(timeout):
+                return None, True
+            if call.exception is not None:
+                raise call.exception
+            return call.result, True
+        
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[(kind, key)]
+            call.done.set()
+        return call.result, False
+    
+    # Function to list the counters as table rows
+    def rows(self):
+        with self._lock:
+            return [
+                {
+                    "種類": label,
+                    "取得": self.executed[kind],
+                    "共有（合流）": self.coalesced[kind],
+                }
+                for kind, label in FLIGHT_KIND_LABELS.items()
+            ]
+    
+    # Function to count the calls that were served by another caller's fetch
+    def total_coalesced(self):
+        with self._lock:
+            return sum(self.coalesced.values())
@@ -0,0 +1,226 @@
+# サイトマップからの求人URLの取得（検索結果ページを巡回せずに取得対象を列挙する）
+#
+# サイトマップインデックスと求人のサイトマップをストリーミングで読み込み、要素ごとに処理して
+# 全体をメモリに載せない。求人URLは lastmod・都道府県・求人IDとともにSQLiteに保存し、
+# 次回以降は lastmod が変わっていないサイトマップを読み飛ばす（差分更新）。
+import gzip
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+from scraper.fetch import make_request
+
+# サイトマップインデックスのURL
+SITEMAP_INDEX_URL = "https://toranet.jp/sitemap.xml"
+# 求人のサイトマップとみなすURL（インデックスにこれに一致するものがなければすべて読む）
+JOB_SITEMAP_PATTERN = re.compile(r'job|kyujin|recruit', re.IGNORECASE)
+# 求人詳細ページのURL（都道府県・求人IDを取り出す）
+JOB_URL_PATTERN = re.compile(r'^https?://(?:www\.)?toranet\.jp/prefectures/([a-z_-]+)/job_detail/(\d+)/?$')
+# SQLiteへまとめて書き込む件数
+INSERT_BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_urls (
+    url TEXT PRIMARY KEY,
+    job_id INTEGER,
+    prefecture TEXT,
+    lastmod TEXT,
+    sitemap TEXT,
+    seen_at REAL
+);
+CREATE INDEX IF NOT EXISTS job_urls_prefecture ON job_urls (prefecture, lastmod);
+CREATE INDEX IF NOT EXISTS job_urls_lastmod ON job_urls (lastmod);
+CREATE TABLE IF NOT EXISTS sitemaps (
+    url TEXT PRIMARY KEY,
+    lastmod TEXT,
+    urls INTEGER,
+    fetched_at REAL
+);
+"""
+
+# Function to iterate the (kind, loc, lastmod) entries of a sitemap or sitemap index without loading it whole
+def iter_sitemap_entries(stream):
+    root = None
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag not in ("sitemap", "url"):
+            continue
+        loc = lastmod = None
+        for child in elem:
+            name = child.tag.rsplit("}", 1)[-1]
+            if name == "loc":
+                loc = (child.text or "").strip()
+            elif name == "lastmod":
+                lastmod = (child.text or "").strip() or None
+        if loc:
+            yield tag, loc, lastmod
+        # 処理済みの要素は破棄し、メモリ使用量を一定に保つ
+        elem.clear()
+        root.clear()
+
+# Function to open the body of a streamed sitemap response (gzip-compressed .xml.gz included)
+def open_sitemap_stream(response, url):
+    response.raw.decode_content = True
+    if url.endswith(".gz"):
+        return gzip.GzipFile(fileobj=response.raw)
+    return response.raw
+
+# Function to parse an ID filter such as "1001, 1005-1010" into (low, high) ranges
+def parse_id_ranges(text):
+    ranges = []
+    for part in re.split(r'[,、\s]+', text or ""):
+        match = re.fullmatch(r'(\d+)(?:-(\d+))?', part)
+        if match:
+            low = int(match.group(1))
+            ranges.append((low, int(match.group(2)) if match.group(2) else low))
+    return ranges
+
+# Local index of job URLs listed in the site's sitemaps
+class SitemapIndex:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+    
+    # Function to refresh the index from the sitemaps (skips sitemaps whose lastmod has not changed)
+    def refresh(self, ctx, index_url=SITEMAP_INDEX_URL, progress=None):
+        import requests
+        import urllib3
+        
+        stats = {"sitemaps": 0, "skipped": 0, "urls": 0, "ignored": 0, "errors": []}
+        queue = [(index_url, None)]
+        while queue:
+            url, lastmod = queue.pop(0)
+            if lastmod is not None and self._sitemap_lastmod(url) == lastmod:
+                stats["skipped"] += 1
+                continue
+            if progress:
+                progress(f"サイトマップを読み込み中: {url}（求人URL {stats['urls']} 件）")
+            
+            response, error = make_request(ctx, url, stream=True)
+            if error:
+                stats["errors"].append(f"{url}: {error}")
+                continue
+            
+            children = []
+            batch = []
+            url_count = 0
+            now = time.time()
+            try:
+                for kind, loc, entry_lastmod in iter_sitemap_entries(open_sitemap_stream(response, url)):
+                    if kind == "sitemap":
+                        children.append((loc, entry_lastmod))
+                        continue
+                    match = JOB_URL_PATTERN.match(loc)
+                    if not match:
+                        stats["ignored"] += 1
+                        continue
+                    batch.append((loc, int(match.group(2)), match.group(1), entry_lastmod, url, now))
+                    url_count += 1
+                    if len(batch) >= INSERT_BATCH_SIZE:
+                        self._insert_urls(batch)
+                        batch = []
+                        if progress:
+                            progress(f"サイトマップを読み込み中: {url}（求人URL {stats['urls'] + url_count} 件）")
+            except (urllib3.exceptions.HTTPError, requests.exceptions.RequestException) as e:
+                # 読み込み中の接続の切断・タイムアウトなどは、そのサイトマップのみ失敗として次へ進む
+                stats["errors"].append(f"{url}: サイトマップの読み込み中にエラーが発生しました: {e}")
+                continue
+            except (ET.ParseError, OSError, EOFError) as e:
+                stats["errors"].append(f"{url}: サイトマップを解析できませんでした: {e}")
+                continue
+            finally:
+                response.close()
+            self._insert_urls(batch)
+            self._record_sitemap(url, lastmod, url_count, now)
+            stats["sitemaps"] += 1
+            stats["urls"] += url_count
+            
+            # インデックスの子サイトマップのうち、求人のサイトマップのみ読む
+            job_children = [child for child in children if JOB_SITEMAP_PATTERN.search(child[0])]
+            queue.extend(job_children or children)
+        return stats
+    
+    def _sitemap_lastmod(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT lastmod FROM sitemaps WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+    
+    def _insert_urls(self, rows):
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO job_urls (url, job_id, prefecture, lastmod, sitemap, seen_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET lastmod = excluded.lastmod, sitemap = excluded.sitemap, seen_at = excluded.seen_at",
+                rows
+            )
+    
+    def _record_sitemap(self, url, lastmod, url_count, fetched_at):
+        with self._lock, self._conn:
+            # サイトマップから消えた求人URLを削除
+            self._conn.execute("DELETE FROM job_urls WHERE sitemap = ? AND seen_at < ?", (url, fetched_at))
+            self._conn.execute(
+                "INSERT INTO sitemaps (url, lastmod, urls, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET lastmod = excluded.lastmod, urls = excluded.urls, fetched_at = excluded.fetched_at",
+                (url, lastmod, url_count, fetched_at)
+            )
+    
+    # Function to list job URLs matching the filters, most recently modified first
+    def urls(self, prefectures=None, id_ranges=None, since=None, limit=None):
+        conditions = []
+        params = []
+        if prefectures:
+            conditions.append(f"prefecture IN ({', '.join('?' * len(prefectures))})")
+            params.extend(prefectures)
+        if id_ranges:
+            conditions.append("(" + " OR ".join("job_id BETWEEN ? AND ?" for _ in id_ranges) + ")")
+            for low, high in id_ranges:
+                params.extend([low, high])
+        if since:
+            # W3C形式の日時は文字列の大小で比較できる
+            conditions.append("lastmod >= ?")
+            params.append(since)
+        sql = "SELECT url FROM job_urls"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY lastmod DESC, job_id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+    
+    # Function to list the prefectures in the index with their URL counts
+    def prefectures(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT prefecture, count(*) FROM job_urls GROUP BY prefecture ORDER BY prefecture"
+            ).fetchall()
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM job_urls").fetchone()[0]
+
+# Function to get the job links to crawl from the sitemap index (same return values as get_job_listings)
+def get_sitemap_links(ctx):
+    if ctx.sitemap_index is None or not len(ctx.sitemap_index):
+        return None, "サイトマップの索引がありません。先に「サイトマップを更新」を実行してください。", SITEMAP_INDEX_URL
+    sitemap_filter = ctx.sitemap_filter or {}
+    links = ctx.sitemap_index.urls(
+        prefectures=sitemap_filter.get("prefectures"),
+        id_ranges=sitemap_filter.get("id_ranges"),
+        since=sitemap_filter.get("since"),
+        limit=ctx.max_jobs,
+    )
+    if not links:
+        return None, "条件に一致する求人URLがサイトマップの索引にありません。", SITEMAP_INDEX_URL
+    ctx.log("info", f"サイトマップの索引から {len(links)} 件の求人URLを取得しました")
+    return links, None, SITEMAP_INDEX_URL
@@ -0,0 +1,109 @@
+# 取得した求人レコードの列指向ストア
+import numpy as np
+
+# 求人レコードの列（job_description_ref は省メモリクロール時の退避先）
+JOB_COLUMNS = [
+    "facility_name", "representative", "location", "phone_number",
+    "job_description", "short_description", "source_url", "job_description_ref",
+    "duplicate_group",
+]
+# 値の重複が多いため辞書エンコードする列
+DICTIONARY_ENCODED_COLUMNS = ["facility_name", "representative", "location", "phone_number"]
+# コード配列の初期の容量（件数）
+INITIAL_CAPACITY = 64
+
+# Function to get the integer type pandas uses for the codes of a categorical with the given number of categories
+def get_code_dtype(category_count):
+    for dtype in (np.int8, np.int16, np.int32):
+        if category_count < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+# Columnar store for scraped job records (dictionary-encoded repetitive columns)
+class JobStore:
+    def __init__(self):
+        # 辞書エンコード列: 値のリストと、pandasがそのカテゴリ数で使う整数型のコード配列（末尾に空きを持たせて伸長する）
+        self._categories = {column: [] for column in DICTIONARY_ENCODED_COLUMNS}
+        self._category_codes = {column: {} for column in DICTIONARY_ENCODED_COLUMNS}
+        self._codes = {column: np.empty(INITIAL_CAPACITY, dtype=get_code_dtype(0)) for column in DICTIONARY_ENCODED_COLUMNS}
+        # その他の列: 通常のリスト
+        self._values = {column: [] for column in JOB_COLUMNS if column not in self._codes}
+        self._length = 0
+        self._exported = False  # コード配列をDataFrameに渡した（渡した範囲を書き換える前に複製する）
+    
+    def _encode(self, column, value):
+        value = value if value is not None else ""
+        code = self._category_codes[column].get(value)
+        if code is None:
+            code = len(self._categories[column])
+            self._categories[column].append(value)
+            self._category_codes[column][value] = code
+            # カテゴリ数が整数型の範囲を超えたら、pandasと同じ型に広げる（広げた配列は渡したものとは別になる）
+            dtype = get_code_dtype(len(self._categories[column]))
+            if dtype != self._codes[column].dtype:
+                self._codes[column] = self._codes[column].astype(dtype)
+        return code
+    
+    def append(self, job):
+        index = self._length
+        if index == len(next(iter(self._codes.values()))):
+            # 容量を倍に広げる（渡したDataFrameは元の配列を参照し続ける）
+            for column, codes in self._codes.items():
+                grown = np.empty(max(2 * len(codes), INITIAL_CAPACITY), dtype=codes.dtype)
+                grown[:index] = codes[:index]
+                self._codes[column] = grown
+        for column in DICTIONARY_ENCODED_COLUMNS:
+            code = self._encode(column, job.get(column))
+            self._codes[column][index] = code
+        for column, values in self._values.items():
+            values.append(job.get(column))
+        self._length += 1
+    
+    def __len__(self):
+        return self._length
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("JobStore index out of range")
+        job = {column: self._categories[column][codes[index]] for column, codes in self._codes.items()}
+        job.update({column: values[index] for column, values in self._values.items()})
+        return job
+    
+    def __setitem__(self, index, job):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("JobStore index out of range")
+        for column in DICTIONARY_ENCODED_COLUMNS:
+            code = self._encode(column, job.get(column))
+            if self._codes[column][index] == code:
+                continue
+            # DataFrameに渡したコードは書き換えず、複製してから書き換える
+            if self._exported:
+                self._codes = {column: codes.copy() for column, codes in self._codes.items()}
+                self._exported = False
+            self._codes[column][index] = code
+        for column, values in self._values.items():
+            values[index] = job.get(column)
+    
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+    
+    def to_dataframe(self):
+        import pandas as pd
+        
+        # コード配列はpandasが使う整数型のまま保持しているため、Categoricalとコピーせずに共有する
+        # （コードは追加時にカテゴリの範囲内であることが分かっているため、検証も省く）
+        data = {}
+        for column in JOB_COLUMNS:
+            if column in self._codes:
+                data[column] = pd.Categorical.from_codes(
+                    self._codes[column][:self._length], dtype=pd.CategoricalDtype(self._categories[column]), validate=False
+                )
+            else:
+                data[column] = self._values[column]
+        self._exported = True
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,127 @@
+# 詳細ページのストリーミング取得（抽出に必要な項目がそろった時点でダウンロードを打ち切る）
+#
+# レスポンス本体を少しずつ読み込み、逐次デコードしてHTMLパーサーに渡す。抽出する項目の見出しと
+# その値の要素がすべて現れた時点、または読み込んだ量が上限に達した時点で残りを読まずに接続を閉じる。
+# 抽出は読み込んだ部分だけで行うため、転送量・デコード・解析の時間がページの残りの分だけ減る。
+# Next.jsのページは埋め込みデータ（__NEXT_DATA__、通常は末尾）からの抽出を優先するため、それが現れるまでは読み込む。
+import codecs
+from html.parser import HTMLParser
+
+# 抽出する項目の見出し（項目 → 見出しに含まれる語）
+DETAIL_SECTION_LABELS = {
+    "job_description": ("仕事内容",),
+    "location": ("勤務地",),
+    "representative": ("代表者",),
+    "phone_number": ("電話番号", "TEL"),
+}
+# 見出しの要素と、見出しの後に続く値の要素
+HEADING_TAGS = {"h2", "h3", "h4", "th", "dt"}
+VALUE_TAGS = {"p", "td", "dd"}
+# Next.jsのページの目印（これがあるページは、末尾の埋め込みデータ __NEXT_DATA__ まで読み込む）
+NEXT_ROOT_ID = "__next"
+NEXT_ASSET_PREFIX = "/_next/"
+NEXT_DATA_ID = "__NEXT_DATA__"
+# 1回に読み込む量と、1ページあたりに読み込む量の上限（バイト）
+STREAM_CHUNK_SIZE = 16 * 1024
+STREAM_BYTE_BUDGET = 512 * 1024
+
+# Incremental HTML parser tracking which target sections (heading and value) have been seen
+class SectionTracker(HTMLParser):
+    def __init__(self, labels=DETAIL_SECTION_LABELS):
+        super().__init__(convert_charrefs=True)
+        self.pending = dict(labels)  # 見出しがまだ現れていない項目
+        self.waiting = set()  # 見出しは現れ、値の要素が閉じるのを待っている項目
+        self.has_page_data = False
+        self.expects_page_data = False  # Next.jsのページで、埋め込みデータがまだ読み込まれていない
+        self.ended = False  # 文書の終わり（</html>）まで読み込んだ
+        self._heading_depth = 0
+        self._heading_text = []
+        self._in_page_data = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in HEADING_TAGS:
+            self._heading_depth += 1
+            return
+        attrs = dict(attrs)
+        if tag == "script" and attrs.get("id") == NEXT_DATA_ID:
+            self.expects_page_data = True
+            self._in_page_data = True
+        elif attrs.get("id") == NEXT_ROOT_ID or (attrs.get("src") or attrs.get("href") or "").startswith(NEXT_ASSET_PREFIX):
+            # 埋め込みデータは通常ページの末尾にあるため、目印を見つけた時点で待つ
+            self.expects_page_data = self.expects_page_data or not self.has_page_data
+    
+    def handle_endtag(self, tag):
+        if tag == "html":
+            self.ended = True
+        elif tag == "script" and self._in_page_data:
+            self._in_page_data = False
+            self.expects_page_data = False
+            self.has_page_data = True
+        elif tag in HEADING_TAGS and self._heading_depth:
+            self._heading_depth -= 1
+            if self._heading_depth == 0:
+                text = "".join(self._heading_text).upper()
+                self._heading_text = []
+                for field, words in list(self.pending.items()):
+                    if any(word in text for word in words):
+                        del self.pending[field]
+                        self.waiting.add(field)
+        elif tag in VALUE_TAGS and self.waiting and self._heading_depth == 0:
+            # 見出しの後の値の要素が閉じた
+            self.waiting.clear()
+    
+    def handle_data(self, data):
+        if self._heading_depth:
+            self._heading_text.append(data)
+    
+    # Function to check whether every target section (and the embedded page data of a Next.js page) has been read
+    def is_complete(self):
+        return not self.pending and not self.waiting and not self.expects_page_data
+
+# Function to check whether the whole body of a streamed response has been received
+# (False if it cannot be told, so that a page is never taken as complete by mistake)
+def is_body_exhausted(response):
+    raw = getattr(response, "raw", None)
+    try:
+        # urllib3と同じく、接続から読み終え、展開済みで未読の分も残っていなければ受信し終えている
+        return bool(raw.isclosed()) and not len(getattr(raw, "_decoded_buffer", b""))
+    except AttributeError:
+        return False
+
+# Function to read a streamed response until all target sections are seen or the byte budget is reached
+def read_until_sections(response, labels=DETAIL_SECTION_LABELS, byte_budget=STREAM_BYTE_BUDGET, chunk_size=STREAM_CHUNK_SIZE):
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    tracker = SectionTracker(labels)
+    chunks = []
+    parts = []
+    size = 0
+    cut = False
+    try:
+        for chunk in response.iter_content(chunk_size):
+            chunks.append(chunk)
+            size += len(chunk)
+            text = decoder.decode(chunk)
+            parts.append(text)
+            tracker.feed(text)
+            if tracker.is_complete() or size >= byte_budget:
+                # 最後の塊で条件を満たした場合（文書の終わりまで読んだ場合を含む）は、残りがないため打ち切りとはしない
+                cut = not (tracker.ended or is_body_exhausted(response))
+                break
+        if not cut:
+            parts.append(decoder.decode(b"", final=True))
+    finally:
+        # 残りは読まずに接続を閉じる
+        response.close()
+    return b"".join(chunks), "".join(parts), {"bytes": size, "cut": cut, "complete": tracker.is_complete()}
+
+# Function to read a detail page up to its target sections, recording the totals of the run
+# (returns the bytes read, their text and whether the rest of the body was left unread)
+def read_detail_sections(ctx, response, url):
+    content, html_text, stats = read_until_sections(response)
+    ctx.stream_stats["pages"] = ctx.stream_stats.get("pages", 0) + 1
+    ctx.stream_stats["bytes"] = ctx.stream_stats.get("bytes", 0) + stats["bytes"]
+    if stats["cut"]:
+        ctx.stream_stats["cut"] = ctx.stream_stats.get("cut", 0) + 1
+        reason = "必要な項目がそろった" if stats["complete"] else "読み込み量の上限に達した"
+        ctx.log("info", f"{reason}ため、先頭 {stats['bytes'] / 1024:.0f} KB で取得を打ち切りました", url=url)
+    return content, html_text, stats["cut"]
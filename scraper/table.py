@@ -0,0 +1,110 @@
+# 結果表示用の整形（表示用クリーニング・結果テーブルの作成）
+import re
+
+# 代表者の後ろに続く住所・電話番号・事業内容などを切り捨てるパターン（最初に現れた位置から末尾まで）
+# 「所在住所」は「住所」と重なるため先に切り捨て、残りは1つのパターンにまとめる
+REPRESENTATIVE_ADDRESS_PATTERN = re.compile(r'所在住所.*$')
+REPRESENTATIVE_CUT_PATTERN = re.compile(r'(?:住所|[0-9０-９]{5,}|東京都|大阪府|神奈川県|埼玉県|千葉県|代表電話|事業内容).*$')
+# 勤務地の先頭のラベルと、後ろに続く別の項目
+LOCATION_LABEL_PATTERN = re.compile(r'^勤務地[：:]\s*')
+LOCATION_CUT_PATTERN = re.compile(r'(?:代表電話|事業内容|応募情報|選考プロセス).*$')
+
+# Function to clean a representative name for display
+def clean_representative_for_display(representative):
+    return REPRESENTATIVE_CUT_PATTERN.sub('', REPRESENTATIVE_ADDRESS_PATTERN.sub('', representative or "")).strip()
+
+# Function to clean a location for display
+def clean_location_for_display(location):
+    return LOCATION_CUT_PATTERN.sub('', LOCATION_LABEL_PATTERN.sub('', location or "")).strip()
+
+# Function to apply a column-wise cleanup to the distinct values only (dictionary-encoded columns are cleaned per category)
+def transform_distinct(values, transform):
+    import numpy as np
+    import pandas as pd
+    
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        cleaned = transform(pd.Series(values.cat.categories, dtype=object)).to_numpy(dtype=object)
+        # 欠損（コード -1）は末尾に追加した空文字を参照させる
+        cleaned = np.append(cleaned, "")
+        return pd.Series(cleaned[values.cat.codes.to_numpy()], index=values.index, dtype=object)
+    return transform(values.fillna("").astype(object))
+
+# Function to clean a column of representative names for display
+def clean_representative_column(values):
+    return (
+        values.str.replace(REPRESENTATIVE_ADDRESS_PATTERN, '', regex=True)
+        .str.replace(REPRESENTATIVE_CUT_PATTERN, '', regex=True)
+        .str.strip()
+    )
+
+# Function to clean a column of locations for display
+def clean_location_column(values):
+    return (
+        values.str.replace(LOCATION_LABEL_PATTERN, '', regex=True)
+        .str.replace(LOCATION_CUT_PATTERN, '', regex=True)
+        .str.strip()
+    )
+
+# Function to clean and format a column of phone numbers for the table
+def format_phone_column(values):
+    phone = values.where(values != "情報なし", "")
+    
+    # 補正・桁区切りの対象は区切りのない数字だけの番号のみ（それ以外は不要な文字の削除だけ行う）
+    digits = phone[phone.str.match(r'^\d+$')]
+    if len(digits):
+        length = digits.str.len()
+        # 7桁で197・473から始まる場合は0120の番号、0で始まらない番号は0（9桁は03-）を前置
+        free_dial = digits.str.match(r'^(?:197|473)\d{4}$')
+        missing_zero = ~free_dial & ~digits.str.startswith('0') & (length > 5)
+        digits = digits.mask(missing_zero, "0" + digits).mask(
+            missing_zero & (length == 9), "03-" + digits.str[:4] + "-" + digits.str[4:]
+        ).mask(free_dial, "0120-" + digits.str[:3] + "-" + digits.str[3:])
+        
+        # 桁区切りがない場合は追加（10桁は固定電話、11桁は携帯電話）
+        unseparated = digits.str.match(r'^0\d{9,10}$')
+        length = digits.str.len()
+        digits = digits.mask(
+            unseparated & (length == 10), digits.str[:2] + "-" + digits.str[2:6] + "-" + digits.str[6:]
+        ).mask(
+            unseparated & (length == 11), digits.str[:3] + "-" + digits.str[3:7] + "-" + digits.str[7:]
+        )
+        phone[digits.index] = digits
+    
+    # 数字とハイフン以外は削除
+    return phone.str.replace(r'[^\d\-]', '', regex=True)
+
+# Function to iterate jobs, keeping only the first posting of each duplicate group
+def iter_unique_jobs(job_list):
+    seen_groups = set()
+    for job in job_list:
+        group = job.get("duplicate_group")
+        if group is not None:
+            if group in seen_groups:
+                continue
+            seen_groups.add(group)
+        yield job
+
+# Function to build the display table from the job store
+def build_job_table(job_list, duplicate_groups=None):
+    import pandas as pd
+    
+    df = job_list.to_dataframe()
+    
+    # 類似求人はグループの先頭の求人のみ表示し、件数を付記
+    if duplicate_groups:
+        df = df.drop_duplicates("duplicate_group").reset_index(drop=True)
+        similar_counts = df["duplicate_group"].map(lambda group: len(duplicate_groups[group]) - 1)
+    
+    # クリーニングは列単位でまとめて行い、辞書エンコード列では重複を除いた値に対してのみ実行される
+    table = pd.DataFrame({
+        "施設名": df["facility_name"],
+        "代表者": transform_distinct(df["representative"], clean_representative_column),
+        "所在地": transform_distinct(df["location"], clean_location_column),
+        "URL": df["source_url"],
+        "電話番号": transform_distinct(df["phone_number"], format_phone_column),
+        "メールアドレス": "",  # プレースホルダー（将来的に実装）
+        "主な事業内容": df["short_description"],
+    })
+    if duplicate_groups:
+        table["類似求人数"] = similar_counts
+    return table
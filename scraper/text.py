@@ -0,0 +1,309 @@
+# テキストからの項目抽出とクリーニング（電話番号・代表者・住所・施設名）
+import re
+import unicodedata
+
+# 電話番号の候補になる数字と区切り文字の並び（5文字以上、または空白区切りのフリーダイヤルの先頭）
+# 4文字以下の数字（日付・時刻・金額など）は候補にならないため、正規表現の中で読み飛ばす
+# 全角の数字・記号やハイフン類（０３－１２３４－５６７８、03ー1234ー5678 など）もそのまま拾う
+PHONE_TOKEN_PATTERN = re.compile(r'[0-9０-９()（）\-－‐‑‒–—―−ーｰ]{5,}|[0０][1１][2２][0０]')
+# 電話番号の直前のキーワード（先頭の1文字で絞り込んでから照合する）
+PHONE_KEYWORD_PATTERN = re.compile(r'[電TtＴｔ](?:(?<=電)話(?:番号)?|(?<=[TtＴｔ])[EeＥｅ][LlＬｌ])')
+# キーワードの優先順（電話番号 > TEL > 電話）
+PHONE_KEYWORD_ORDER = {"電話番号": 0, "tel": 1, "電話": 2}
+DIGIT_PATTERN = re.compile(r'[0-9０-９]')
+DIGIT_RUN_PATTERN = re.compile(r'[0-9]+')
+# 全角の数字・記号・空白とハイフン類を半角にそろえる（1文字ずつ対応するため位置は変わらない）
+PHONE_CHAR_TABLE = str.maketrans("０１２３４５６７８９（）　－‐‑‒–—―−ーｰ", "0123456789() " + "-" * 10)
+# フリーダイヤル（0120-123-456、0120-12-3456）
+FREE_DIAL_PATTERNS = [
+    re.compile(r'0120[\-\s]?[0-9]{3}[\-\s]?[0-9]{3}'),
+    re.compile(r'0120[\-\s]?[0-9]{2}[\-\s]?[0-9]{4}'),
+]
+# 市外局番-市内局番-番号（03-1234-5678 or 03(1234)5678）
+AREA_CODE_PATTERN = re.compile(r'0[0-9]{1,4}[-(]?[0-9]{1,4}[)-]?[0-9]{3,4}')
+
+# 候補の優先度（小さいほど優先、同じ優先度ではテキスト中で先に現れたもの）
+RANK_FREE_DIAL = 0  # 0120-XXX-XXX（0120-XX-XXXXは+1）
+RANK_KEYWORD = 2  # 電話番号・TEL・電話の直後（キーワードの優先順に+0〜2）
+RANK_DIGITS = 5  # 区切りのない数字（0始まり10-11桁、9-11桁、7桁の順に+0〜2）
+RANK_AREA_CODE = 8  # 市外局番付きの番号
+RANK_SHORT = 9  # 単独の5-6桁の番号（最後の手段）
+
+# Function to format a run of digits as a phone number (10-11 digits, 0120 free dial)
+def format_phone_run(digits):
+    if digits.startswith('0120'):
+        return f"{digits[:4]}-{digits[4:7]}-{digits[7:10]}"
+    elif len(digits) == 10:
+        return f"{digits[:2]}-{digits[2:6]}-{digits[6:10]}"
+    elif len(digits) == 11:
+        return f"{digits[:3]}-{digits[3:7]}-{digits[7:11]}"
+    return None
+
+# Function to get the number written right after a keyword (7-15 characters from the first digit)
+def get_keyword_phone(raw):
+    first_digit = DIGIT_PATTERN.search(raw).start()
+    # 数字の前の区切り文字は、7文字に満たない場合のみ番号に含める
+    start = min(first_digit, max(0, len(raw) - 7))
+    if len(raw) - start < 7:
+        return None
+    phone = raw[start:start + 15]
+    digits = re.sub(r'[^0-9]', '', phone)
+    if 10 <= len(digits) <= 11 or (len(digits) > 11 and digits.startswith('0120')):
+        return format_phone_run(digits)
+    return phone
+
+# Function to list the phone number candidates of a single token as (rank, phone)
+def get_phone_candidates(text, token, keyword_rank):
+    raw = token.group(0).translate(PHONE_CHAR_TABLE)
+    candidates = []
+    
+    # フリーダイヤル（空白区切りにも対応するため、後続の数文字も含めて判定）
+    if '0120' in raw:
+        window = text[token.start():token.end() + 9].translate(PHONE_CHAR_TABLE)
+        for offset, pattern in enumerate(FREE_DIAL_PATTERNS):
+            match = pattern.search(window)
+            if match:
+                phone = match.group(0)
+                if re.match(r'0120[0-9]{6}', phone):
+                    # 0120-XXX-XXX の形式に整形
+                    phone = f"{phone[:4]}-{phone[4:7]}-{phone[7:]}"
+                candidates.append((RANK_FREE_DIAL + offset, phone))
+                break
+    
+    # 直前に電話番号のキーワードがあるもの
+    if keyword_rank is not None:
+        phone = get_keyword_phone(raw)
+        if phone:
+            candidates.append((RANK_KEYWORD + keyword_rank, phone))
+    
+    # 区切りのない数字の塊・単独の5-6桁の番号
+    for run in DIGIT_RUN_PATTERN.finditer(raw):
+        digits = run.group(0)
+        if len(digits) in (10, 11) and digits.startswith('0'):
+            candidates.append((RANK_DIGITS, format_phone_run(digits)))
+        elif 9 <= len(digits) <= 11:
+            candidates.append((RANK_DIGITS + 1, format_phone_run(digits) if len(digits) >= 10 else digits))
+        elif len(digits) == 7:
+            # 7桁の数字（0120の後半部分の可能性）
+            if digits.startswith('197') or digits.startswith('473'):
+                candidates.append((RANK_DIGITS + 2, f"0120-{digits[:3]}-{digits[3:7]}"))
+            else:
+                candidates.append((RANK_DIGITS + 2, digits))
+        elif len(digits) in (5, 6) and 0 < token.start() + run.start() and token.start() + run.end() < len(text):
+            candidates.append((RANK_SHORT, digits))
+    
+    # 市外局番付きの番号（ハイフン・括弧区切り）
+    match = AREA_CODE_PATTERN.search(raw)
+    if match:
+        candidates.append((RANK_AREA_CODE, match.group(0)))
+    
+    return candidates
+
+# Function to extract phone number from text
+def extract_phone_number(text):
+    if not text:
+        return None
+    
+    # キーワードは数が少ないため先にまとめて拾い、数字の並びと出現順に突き合わせる
+    keywords = [
+        (match.end(), PHONE_KEYWORD_ORDER[unicodedata.normalize("NFKC", match.group(0)).lower()])
+        for match in PHONE_KEYWORD_PATTERN.finditer(text)
+    ]
+    keyword_index = 0
+    
+    # 数字の並びを一度だけ走査し、各候補に優先度を付けて最も優先度の高いものを残す
+    best_rank, best_phone = None, None
+    for token in PHONE_TOKEN_PATTERN.finditer(text):
+        if not DIGIT_PATTERN.search(token.group(0)):
+            continue
+        
+        # 前の数字以降に現れたキーワードのみ有効（キーワードと番号の間に数字を挟まない）
+        keyword_rank = None
+        while keyword_index < len(keywords) and keywords[keyword_index][0] <= token.start():
+            end, rank = keywords[keyword_index]
+            keyword_index += 1
+            if not DIGIT_PATTERN.search(text, end, token.start()):
+                keyword_rank = rank if keyword_rank is None else min(keyword_rank, rank)
+        
+        for rank, phone in get_phone_candidates(text, token, keyword_rank):
+            if best_rank is None or rank < best_rank:
+                best_rank, best_phone = rank, phone
+        # 最優先のフリーダイヤルが見つかれば、それより前に候補はないため終了
+        if best_rank == RANK_FREE_DIAL:
+            break
+    
+    return best_phone
+
+# Function to clean text for extraction
+def clean_text_for_extraction(text):
+    if not text:
+        return ""
+    
+    # HTMLタグを削除
+    text = re.sub(r'<[^>]+>', ' ', text)
+    
+    # 不要な文字を削除
+    text = re.sub(r'[\[\]【】［］()（）「」『』≪≫<>＜＞""\'\']+', ' ', text)
+    
+    # 連続する空白を1つにまとめる
+    text = re.sub(r'\s+', ' ', text)
+    
+    return text.strip()
+
+# Function to extract representative name from text
+def extract_representative(text):
+    if not text:
+        return ""
+    
+    # テキストを前処理
+    text = clean_text_for_extraction(text)
+    
+    # 代表者のパターン
+    patterns = [
+        # ラベル「代表者」の後に続く名前
+        r'代表者\s*[\n\r:：]*\s*([^\n\r（(【［[{]+)',
+        r'代表取締役\s*[\n\r:：]*\s*([^\n\r（(【［[{]+)',
+        r'院長\s*[\n\r:：]*\s*([^\n\r:：（(【［[{]+)',
+        r'理事長\s*[\n\r:：]*\s*([^\n\r:：（(【［[{]+)',
+        # 「代表」「院長」単語の後に続く名前
+        r'代表\s*[\n\r:：]*\s*([^\n\r:：（(【［[{]+)',
+        r'院長\s*[\n\r:：]*\s*([^\n\r:：（(【［[{]+)',
+        r'理事長\s*[\n\r:：]*\s*([^\n\r:：（(【［[{]+)'
+    ]
+    
+    for pattern in patterns:
+        matches = re.search(pattern, text, re.DOTALL)
+        if matches and matches.group(1):
+            # 取得した名前の前後の空白を削除
+            name = matches.group(1).strip()
+            # 不適切な値や短すぎる値は無視
+            if name and name != "者" and len(name) > 1:
+                # 不適切な値を除外
+                if re.search(r'[】］）】\])]$', name) or name == "名" or "名】" in name or "株式会社" in name:
+                    continue
+                
+                # 名前っぽくない文字列を除外
+                if re.search(r'^\d+$', name) or re.search(r'^[A-Za-z0-9_\-\.]+$', name):
+                    continue
+                
+                # 名前に含まれそうな余分な情報（住所など）を削除
+                name = re.sub(r'所在住所.*$', '', name)
+                name = re.sub(r'住所.*$', '', name)
+                name = re.sub(r'[0-9０-９]{5,}.*$', '', name)  # 郵便番号などの数字が続くパターン
+                name = re.sub(r'東京都.*$', '', name)  # 住所が含まれる場合
+                name = re.sub(r'大阪府.*$', '', name)
+                name = re.sub(r'神奈川県.*$', '', name)
+                name = re.sub(r'埼玉県.*$', '', name)
+                name = re.sub(r'千葉県.*$', '', name)
+                name = re.sub(r'代表電話.*$', '', name)
+                name = re.sub(r'事業内容.*$', '', name)
+                
+                # 最終的なクリーニング
+                name = name.strip()
+                if len(name) > 1:
+                    return name
+    
+    return ""
+
+# Function to extract address from text
+def extract_address(text):
+    if not text:
+        return ""
+    
+    # テキストを前処理
+    text = clean_text_for_extraction(text)
+    
+    # 住所のパターン
+    patterns = [
+        # 「勤務地」の後に続くテキスト
+        r'勤務地\s*[\n\r:：]*\s*([^\n\r]{5,100})',
+        # 「所在住所」または「所在地」の後に続くテキスト
+        r'所在住所\s*[\n\r:：]*\s*([^\n\r]{5,100})',
+        r'所在地\s*[\n\r:：]*\s*([^\n\r]{5,100})',
+        # 郵便番号から始まる住所
+        r'〒\d{3}-\d{4}\s*([^\n\r]{5,100})',
+        r'\d{3}-\d{4}\s*([^\n\r]{5,100})',
+        r'\d{7}\s*([^\n\r]{5,100})'
+    ]
+    
+    for pattern in patterns:
+        matches = re.search(pattern, text, re.DOTALL)
+        if matches and matches.group(1):
+            # 抽出した住所を整形（改行や余分なスペースを削除）
+            address = matches.group(1).strip()
+            address = re.sub(r'\s+', ' ', address)
+            return address
+    
+    return ""
+
+# Function to clean facility name
+def clean_facility_name(name):
+    if not name:
+        return "情報なし"
+    
+    # 「の求人詳細」などの不要なテキストを削除
+    name = re.sub(r'の求人詳細$', '', name)
+    name = re.sub(r'の求人情報$', '', name)
+    name = re.sub(r'の求人$', '', name)
+    name = re.sub(r'の募集詳細$', '', name)
+    name = re.sub(r'の募集$', '', name)
+    name = re.sub(r'の採用情報$', '', name)
+    name = re.sub(r'詳細情報$', '', name)
+    name = re.sub(r'詳細$', '', name)
+    
+    # さらに一般的なパターンを削除
+    name = re.sub(r'の仕事$', '', name)
+    name = re.sub(r'の仕事内容$', '', name)
+    name = re.sub(r'の会社概要$', '', name)
+    name = re.sub(r'の企業情報$', '', name)
+    name = re.sub(r'【.*?】', '', name)  # 【】で囲まれた部分を削除
+    name = re.sub(r'「.*?」', '', name)  # 「」で囲まれた部分を削除
+    name = re.sub(r'\(.*?\)', '', name)  # ()で囲まれた部分を削除
+    name = re.sub(r'（.*?）', '', name)  # （）で囲まれた部分を削除
+    
+    # とらばーゆ関連の文言を削除
+    name = re.sub(r'とらばーゆ', '', name)
+    name = re.sub(r'転職情報', '', name)
+    
+    # 職種名を削除（一般的な職種名のパターン）
+    job_patterns = [
+        '看護師', '介護士', '医師', '薬剤師', '理学療法士', '作業療法士', 
+        '言語聴覚士', '保育士', '栄養士', '調理師', '事務', 'スタッフ',
+        '正社員', 'パート', 'アルバイト', '契約社員', '派遣'
+    ]
+    for pattern in job_patterns:
+        name = re.sub(f'{pattern}(募集)?$', '', name)
+        name = re.sub(f'^{pattern}', '', name)
+    
+    # 連続する空白を1つにまとめる
+    name = re.sub(r'\s+', ' ', name)
+    
+    # 前後の空白と不要な記号を削除
+    name = name.strip()
+    name = re.sub(r'^[、,.:：・]+', '', name)
+    name = re.sub(r'[、,.:：・]+$', '', name)
+    
+    # 再度前後の空白を削除
+    return name.strip()
+
+# 職種名・募集文の語（施設名として抽出した文字列が求人のタイトルでないかの判定に使用）
+JOB_TITLE_PATTERN = re.compile(r'求人|募集|採用|とらばーゆ|転職|[！!]')
+
+# Function to check whether a cleaned facility name looks like a facility name (not empty or a job title)
+def is_valid_facility_name(name):
+    return bool(name) and name != "情報なし" and 1 < len(name) <= 60 and not JOB_TITLE_PATTERN.search(name)
+
+# Function to format a phone number from its digits
+def format_phone_digits(digits):
+    if len(digits) >= 10:
+        if digits.startswith('0120'):
+            return f"{digits[:4]}-{digits[4:7]}-{digits[7:10]}"
+        elif len(digits) == 10:
+            return f"{digits[:2]}-{digits[2:6]}-{digits[6:10]}"
+        elif len(digits) == 11:
+            return f"{digits[:3]}-{digits[3:7]}-{digits[7:11]}"
+        return digits
+    # 桁数が少ない場合、0120の可能性を考慮
+    if len(digits) == 7 and (digits.startswith('197') or digits.startswith('473')):
+        return f"0120-{digits[:3]}-{digits[3:7]}"
+    return digits
@@ -0,0 +1,258 @@
+# 画面表示（HTML・統計・結果テーブル・詳細）
+import gc
+import html
+import re
+import time
+
+import streamlit as st
+
+from scraper.debug_log import LOG_LEVELS
+from scraper.memory import load_job_description
+from scraper.table import build_job_table, clean_location_for_display, clean_representative_for_display
+
+# Function to display HTML response
+def display_html_response(ctx, response, title, html_text=None):
+    if ctx.show_html and response:
+        with st.expander(f"{title} - HTML表示"):
+            # メモリ最適化のため、大きなHTMLの場合は一部のみを表示（ストリーミング取得では読み込んだ部分）
+            html_text = response.text if html_text is None else html_text
+            if ctx.optimize_memory and len(html_text) > 20000:
+                html_text = html_text[:10000] + "\n...(省略)..." + html_text[-10000:]
+            
+            st.code(html.escape(html_text), language="html")
+            
+            # 明示的にメモリ解放
+            if ctx.enable_gc:
+                html_text = None
+                gc.collect()
+
+# Function to display selector statistics in debug mode
+def display_selector_stats(ctx):
+    if not ctx.debug_mode:
+        return
+    import pandas as pd
+    
+    with st.expander("セレクタ統計（抽出戦略ごとの成功率）"):
+        rows = ctx.selector_stats.rows()
+        if rows:
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        else:
+            st.write("まだ統計がありません。")
+        if st.button("セレクタ統計をリセット"):
+            ctx.selector_stats.clear()
+            save_selector_stats(ctx)
+
+# Function to save selector statistics, warning on failure in debug mode
+def save_selector_stats(ctx):
+    error = ctx.selector_stats.save()
+    if error and ctx.debug_mode:
+        st.warning(error)
+
+# Function to warn about layouts without an extraction plan
+def display_layout_report(ctx):
+    unknown = {fp: entry for fp, entry in ctx.layout_stats.items() if entry["plan"] is None}
+    if unknown:
+        st.warning(f"既知の抽出プランに一致しないレイアウトを {len(unknown)} 種類検出しました。サイトのデザインが変更された可能性があります。")
+    if ctx.debug_mode and ctx.layout_stats:
+        import pandas as pd
+        
+        with st.expander("レイアウト検出結果"):
+            st.dataframe(pd.DataFrame([
+                {
+                    "フィンガープリント": fp,
+                    "抽出プラン": entry["plan"] or "(未知)",
+                    "ページ数": entry["pages"],
+                    "クラス数": entry["class_count"],
+                    "例": entry["example_url"],
+                }
+                for fp, entry in ctx.layout_stats.items()
+            ]), use_container_width=True, hide_index=True)
+
+# Function to display how many retries were used per error class
+def display_retry_summary(ctx):
+    rows = [row for row in ctx.retry_policy.rows() if row["再試行"]]
+    if not rows:
+        return
+    import pandas as pd
+    
+    with st.expander(f"再試行の内訳（{sum(row['再試行'] for row in rows)} 回）"):
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+# Function to display the circuit breaker state of each host in the sidebar
+def display_circuit_breakers(ctx):
+    rows = ctx.circuit_breakers.rows()
+    with st.sidebar.expander("接続状態（ホストごと）", expanded=ctx.circuit_breakers.has_open()):
+        if not rows:
+            st.caption("まだリクエストしていません。")
+            return
+        import pandas as pd
+        
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        st.caption("連続して失敗したホストへのリクエストは一時停止し、一定時間後に1件だけ試してから再開します。")
+        if st.button("接続状態をリセット"):
+            ctx.circuit_breakers.clear()
+
+# Function to display the egress proxy states in the sidebar
+def display_proxy_pool(ctx):
+    if ctx.proxy_pool is None:
+        return
+    import pandas as pd
+    
+    with st.sidebar.expander("プロキシの状態", expanded=ctx.proxy_pool.has_evicted()):
+        st.dataframe(pd.DataFrame(ctx.proxy_pool.rows()), use_container_width=True, hide_index=True)
+        st.caption("送信間隔はプロキシごとに守り、連続して失敗したプロキシは一定時間除外します。")
+        if st.button("除外したプロキシを戻す"):
+            ctx.proxy_pool.reset()
+
+# Function to list the background crawls in the sidebar and choose the one to display
+def select_crawl_job(service, current_id):
+    jobs = service.jobs()
+    if not jobs:
+        return current_id
+    import pandas as pd
+    
+    with st.sidebar.expander("バックグラウンドのクロール", expanded=any(job.is_active() for job in jobs)):
+        st.dataframe(pd.DataFrame([job.row() for job in jobs]), use_container_width=True, hide_index=True)
+        ids = [job.id for job in jobs]
+        labels = [f"{job.id}: {job.keyword}（{job.row()['状態']}）" for job in jobs]
+        index = ids.index(current_id) if current_id in ids else 0
+        selected = st.selectbox("表示するクロール", labels, index=index, key=f"crawl_job_select_{current_id}")
+    return ids[labels.index(selected)]
+
+# Function to display how many requests were shared with concurrent runs in the sidebar
+def display_single_flight(ctx):
+    rows = ctx.single_flight.rows()
+    if not any(row["取得"] for row in rows):
+        return
+    import pandas as pd
+    
+    with st.sidebar.expander(f"リクエストの共有（{ctx.single_flight.total_coalesced()} 件）"):
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        st.caption("複数の実行が同じページを同時に取得しようとした場合は、1回だけ取得して結果を共有します。")
+
+# ログビューアの1ページあたりの件数
+LOG_PAGE_SIZE = 100
+LOG_LEVEL_LABELS = {"info": "情報", "success": "成功", "warning": "警告", "error": "エラー"}
+
+# Function to display the debug log with level/text filters and pagination
+def display_debug_log(ctx):
+    log = ctx.debug_log
+    log.flush()
+    if not len(log):
+        return
+    import pandas as pd
+    
+    with st.expander(f"実行ログ（{len(log)} 件）", expanded=ctx.debug_mode):
+        filter_columns = st.columns([2, 2, 1])
+        labels = [LOG_LEVEL_LABELS[level] for level in LOG_LEVELS]
+        selected = filter_columns[0].multiselect("種類", labels, default=labels, key="debug_log_levels")
+        levels = [level for level in LOG_LEVELS if LOG_LEVEL_LABELS[level] in selected]
+        text = filter_columns[1].text_input("絞り込み（メッセージ・URL）", key="debug_log_text")
+        entries = log.entries(levels, text)
+        page_count = max(1, -(-len(entries) // LOG_PAGE_SIZE))
+        page = min(filter_columns[2].number_input("ページ", min_value=1, value=1, key="debug_log_page"), page_count)
+        
+        # 新しいものから表示
+        start = (page - 1) * LOG_PAGE_SIZE
+        page_entries = entries[::-1][start:start + LOG_PAGE_SIZE]
+        st.dataframe(pd.DataFrame([
+            {
+                "時刻": time.strftime("%H:%M:%S", time.localtime(entry["time"])),
+                "種類": LOG_LEVEL_LABELS.get(entry["level"], entry["level"]),
+                "メッセージ": entry["message"],
+                "URL": entry.get("url", ""),
+            }
+            for entry in page_entries
+        ], columns=["時刻", "種類", "メッセージ", "URL"]), use_container_width=True, hide_index=True)
+        
+        caption = f"{len(entries)} 件中 {start + 1 if page_entries else 0}〜{start + len(page_entries)} 件を表示（{page}/{page_count} ページ）"
+        if log.dropped:
+            caption += f"。古い {log.dropped} 件は破棄しました"
+        if log.path:
+            caption += f"。保存先: {log.path}"
+        st.caption(caption)
+
+# Function to display the full-text search over previously scraped jobs
+def display_search_index(ctx):
+    index = ctx.search_index
+    if index is None:
+        return
+    import pandas as pd
+    
+    with st.expander(f"取得済みの求人を検索（{len(index)} 件）"):
+        if index.error:
+            st.warning(index.error)
+            return
+        query = st.text_input("キーワード（空白区切りですべてを含む求人を検索。例：訪問看護 渋谷）", key="search_index_query")
+        if query:
+            started_at = time.perf_counter()
+            results = index.search(query)
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            st.caption(f"上位 {len(results)} 件（{elapsed_ms:.0f} ms）")
+            if results:
+                st.dataframe(pd.DataFrame([
+                    {
+                        "施設名": result["facility_name"],
+                        "所在地": clean_location_for_display(result["location"]),
+                        "該当箇所": result["snippet"],
+                        "URL": result["source_url"],
+                        "取得日時": time.strftime("%Y-%m-%d %H:%M", time.localtime(result["indexed_at"])),
+                    }
+                    for result in results
+                ]), use_container_width=True, hide_index=True)
+        if st.button("検索索引を削除", key="search_index_clear"):
+            index.clear()
+
+# Function to display job details in a table
+def display_job_table(job_list, duplicate_groups=None):
+    df = build_job_table(job_list, duplicate_groups)
+    
+    # カラム幅を設定して表示
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,  # インデックス（行番号）を非表示
+        column_config={
+            "施設名": st.column_config.TextColumn("施設名", width="medium"),
+            "代表者": st.column_config.TextColumn("代表者", width="small"),
+            "所在地": st.column_config.TextColumn("所在地", width="large"),
+            "URL": st.column_config.TextColumn("URL", width="medium"),
+            "電話番号": st.column_config.TextColumn("電話番号", width="small"),
+            "メールアドレス": st.column_config.TextColumn("メールアドレス", width="medium"),
+            "主な事業内容": st.column_config.TextColumn("主な事業内容", width="large"),
+            "類似求人数": st.column_config.NumberColumn("類似求人数", width="small")
+        }
+    )
+    return df
+
+# Function to display full job details
+def display_full_job_details(ctx, job):
+    with st.expander(f"【詳細】{job['facility_name']}"):
+        st.markdown(f"**施設名**: {job['facility_name']}")
+        
+        # 代表者情報（空の場合は表示しない）
+        if job['representative']:
+            # クリーニング
+            representative = clean_representative_for_display(job['representative'])
+            
+            st.markdown(f"**代表者**: {representative}")
+        
+        # 所在地情報（空の場合は表示しない）
+        if job['location']:
+            # クリーニング
+            location = clean_location_for_display(job['location'])
+            
+            st.markdown(f"**所在地**: {location}")
+            
+        st.markdown(f"**URL**: {job['source_url']}")
+        
+        # 電話番号情報（情報なしの場合は表示しない）
+        if job['phone_number'] and job['phone_number'] != "情報なし":
+            # 電話番号のクリーニング
+            phone_number = job['phone_number']
+            phone_number = re.sub(r'[^\d\-\(\)]', '', phone_number).strip()
+            
+            st.markdown(f"**電話番号**: {phone_number}")
+        
+        st.markdown("**主な事業内容**:")
+        st.markdown(load_job_description(ctx, job))